@@ -0,0 +1,183 @@
+import itertools
+import threading
+import time
+from collections import deque
+
+
+class AlertHistory:
+    """Bounded alert event log with an acknowledge/resolve lifecycle.
+
+    An alert is keyed by (patient, source), where the source is a sensor
+    label or a rule name, and is counted under its ``sensor``. Raising a key
+    that is already open only bumps its ``count``/``last_seen``, so a
+    condition that persists across readings is one alert, not one per
+    reading. Every alert goes into a per-patient ring
+    of ``per_patient`` entries and a global time-ordered log trimmed to
+    ``max_events`` and ``max_age_s``. Open alerts are tracked separately
+    from the logs, so eviction never loses one that is still active.
+
+    Counters are updated as alerts change state: open/acknowledged counts,
+    totals per sensor, a one-hour window of per-minute buckets and the sum
+    of resolve times. ``get_statistics`` therefore costs the same however
+    long the process has been running.
+    """
+
+    BUCKETS = 60   # one-minute buckets in the per-hour window
+
+    def __init__(self, per_patient=100, max_events=10000, max_age_s=24 * 3600, clock=time.time):
+        self.per_patient = per_patient
+        self.max_events = max_events
+        self.max_age_s = max_age_s
+        self.clock = clock
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._log = deque()          # every alert, in raise order
+        self._patients = {}          # patient_id -> deque(maxlen=per_patient)
+        self._open = {}              # patient_id -> {source: alert} (active or acknowledged)
+        self._by_id = {}             # alert id -> open alert
+
+        self._counts = {"raised": 0, "active": 0, "acknowledged": 0, "resolved": 0, "evicted": 0}
+        self._by_sensor = {}         # sensor -> alerts raised
+        self._open_by_sensor = {}    # sensor -> open alerts
+        self._resolve_seconds = 0.0
+        self._buckets = deque([0] * self.BUCKETS, maxlen=self.BUCKETS)
+        self._bucket_minute = None   # minute of the newest bucket
+        self._last_hour = 0
+
+    # ---------- lifecycle ----------
+
+    def raise_alert(self, patient_id, source, message, sensor=None, now=None):
+        """Open an alert for (patient, source), or refresh the open one; returns the alert dict."""
+        now = self.clock() if now is None else now
+        sensor = source if sensor is None else sensor
+        with self._lock:
+            opened = self._open.get(patient_id)
+            alert = opened.get(source) if opened else None
+            if alert is not None:
+                alert["count"] += 1
+                alert["last_seen"] = now
+                alert["message"] = message
+                return alert
+
+            alert = {"id": next(self._ids), "patient_id": patient_id, "source": source, "sensor": sensor,
+                     "message": message, "status": "active", "raised_at": now, "last_seen": now, "count": 1,
+                     "acknowledged_at": None, "acknowledged_by": None, "resolved_at": None}
+            self._open.setdefault(patient_id, {})[source] = alert
+            self._by_id[alert["id"]] = alert
+            self._log.append(alert)
+            ring = self._patients.get(patient_id)
+            if ring is None:
+                ring = self._patients[patient_id] = deque(maxlen=self.per_patient)
+            ring.append(alert)
+
+            self._counts["raised"] += 1
+            self._counts["active"] += 1
+            self._by_sensor[sensor] = self._by_sensor.get(sensor, 0) + 1
+            self._open_by_sensor[sensor] = self._open_by_sensor.get(sensor, 0) + 1
+            self._advance(now)
+            self._buckets[-1] += 1
+            self._last_hour += 1
+            self._evict(now)
+            return alert
+
+    def acknowledge(self, alert_id, by=None, now=None):
+        """Mark an open alert acknowledged; False if it is unknown or already closed."""
+        with self._lock:
+            alert = self._by_id.get(alert_id)
+            if alert is None or alert["status"] != "active":
+                return False
+            alert["status"] = "acknowledged"
+            alert["acknowledged_at"] = self.clock() if now is None else now
+            alert["acknowledged_by"] = by
+            self._counts["active"] -= 1
+            self._counts["acknowledged"] += 1
+            return True
+
+    def resolve(self, alert_id, now=None):
+        """Close an open alert; returns it, or None if it is unknown or already resolved."""
+        with self._lock:
+            alert = self._by_id.get(alert_id)
+            if alert is not None:
+                self._close(alert, self.clock() if now is None else now)
+            return alert
+
+    def resolve_source(self, patient_id, source, now=None):
+        """Close the open alert for (patient, source), if any."""
+        with self._lock:
+            alert = self._open.get(patient_id, {}).get(source)
+            if alert is None:
+                return False
+            self._close(alert, self.clock() if now is None else now)
+            return True
+
+    def _close(self, alert, now):
+        self._counts["active" if alert["status"] == "active" else "acknowledged"] -= 1
+        alert["status"] = "resolved"
+        alert["resolved_at"] = now
+        opened = self._open[alert["patient_id"]]
+        del opened[alert["source"]]
+        if not opened:
+            del self._open[alert["patient_id"]]
+        del self._by_id[alert["id"]]
+        self._open_by_sensor[alert["sensor"]] -= 1
+        self._counts["resolved"] += 1
+        self._resolve_seconds += now - alert["raised_at"]
+
+    # ---------- bounded storage ----------
+
+    def _evict(self, now):
+        log = self._log
+        cutoff = now - self.max_age_s if self.max_age_s else None
+        while log and (len(log) > self.max_events or (cutoff is not None and log[0]["raised_at"] < cutoff)):
+            log.popleft()
+            self._counts["evicted"] += 1
+
+    def _advance(self, now):
+        """Slide the per-minute buckets forward to ``now`` (at most BUCKETS steps)."""
+        minute = int(now // 60)
+        if self._bucket_minute is None:
+            self._bucket_minute = minute
+            return
+        steps = min(minute - self._bucket_minute, self.BUCKETS)
+        for _ in range(max(steps, 0)):
+            self._last_hour -= self._buckets[0]
+            self._buckets.append(0)
+        self._bucket_minute = max(self._bucket_minute, minute)
+
+    # ---------- queries ----------
+
+    def open_alerts(self, patient_id=None):
+        """Active and acknowledged alerts, for one patient or everyone."""
+        with self._lock:
+            if patient_id is not None:
+                return list(self._open.get(patient_id, {}).values())
+            return [alert for opened in self._open.values() for alert in opened.values()]
+
+    def open_sources(self, patient_id):
+        with self._lock:
+            return list(self._open.get(patient_id, ()))
+
+    def patient_history(self, patient_id):
+        """The patient's most recent alerts, oldest first."""
+        with self._lock:
+            return list(self._patients.get(patient_id, ()))
+
+    def recent(self, limit=100):
+        """The newest ``limit`` alerts from the global log, newest first."""
+        with self._lock:
+            return list(itertools.islice(reversed(self._log), limit))
+
+    def get_statistics(self, now=None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._advance(now)
+            resolved = self._counts["resolved"]
+            return dict(
+                self._counts,
+                open=self._counts["active"] + self._counts["acknowledged"],
+                by_sensor=dict(self._by_sensor),
+                open_by_sensor={sensor: n for sensor, n in self._open_by_sensor.items() if n},
+                alerts_last_hour=self._last_hour,
+                mean_time_to_resolve_s=self._resolve_seconds / resolved if resolved else None,
+                logged=len(self._log)
+            )
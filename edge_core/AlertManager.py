@@ -1,4 +1,27 @@
+from datetime import datetime
+
+import numpy as np
+
+from .AlertHistory import AlertHistory
+from .NotificationDispatcher import NotificationDispatcher
+from .StreamingAlertRules import StreamingAlertRules
+from .ThresholdProfiles import ThresholdProfiles
+from .VitalsStore import SENSOR_CODES, timestamp_ns
+
+
 class AlertManager:
+    # Lower-cased sensor names as readings carry them -> SENSOR_CODES
+    SENSOR_ALIASES = {
+        "ecg": SENSOR_CODES["ECG"],
+        "bp_sys": SENSOR_CODES["BP_SYS"], "bp_systolic": SENSOR_CODES["BP_SYS"],
+        "bp_dia": SENSOR_CODES["BP_DIA"], "bp_diastolic": SENSOR_CODES["BP_DIA"],
+        "spo2": SENSOR_CODES["SpO2"],
+        "temp": SENSOR_CODES["Temp"]
+    }
+    # Keys of ``thresholds`` -> sensor code, and the label alerts are tracked under
+    THRESHOLD_CODES = {"ecg": 1, "bp_systolic": 2, "bp_diastolic": 3, "spo2": 4, "temp": 5}
+    LABELS = {1: "Ecg", 2: "Systolic BP", 3: "Diastolic BP", 4: "Spo2", 5: "Temp"}
+
     def __init__(self, config, data_manager):
         self.config = config
         self.data_manager = data_manager
@@ -10,47 +33,217 @@ class AlertManager:
             "spo2": (95, 100),  # %
             "temp": (36.1, 37.5)  # °C
         }
+        # Ward/patient overrides on top of these, hot-reloaded from the profiles file
+        self.profiles = ThresholdProfiles(self.thresholds, getattr(config, "threshold_profiles_path", None),
+                                          getattr(config, "threshold_reload_interval", 2.0), self.THRESHOLD_CODES)
+        # Current alert messages per patient (open alerts only); the history keeps the lifecycle
         self.alerts = {}
+        self.history = AlertHistory(getattr(config, "alert_history_per_patient", 100),
+                                    getattr(config, "alert_log_max_events", 10000),
+                                    getattr(config, "alert_log_max_age_s", 24 * 3600))
+        # Coalesced delivery to the configured sinks (None when notification_sinks is unset)
+        self.notifier = NotificationDispatcher.from_config(config)
+        # Stateful rules (k-of-n, sustained, rate of change) instead of single-reading alerts
+        self.rules = StreamingAlertRules() if getattr(config, "streaming_alerts", False) else None
 
-    def generate_alert(self, patient_id, twin, predictions):
-        alerts = []
-        vitals = twin.get("vitals", [])
+    def threshold_arrays(self, profile=0):
+        """(low, high) arrays of one profile row indexed by sensor code; unknown codes never alert."""
+        table = self.profiles.table()
+        return table.low[profile], table.high[profile]
 
-        for vital in vitals:
-            # Extract sensor type + value from dict or object
-            sensor_type = getattr(vital, "sensor_type", vital.get("sensor_type", "")).lower()
-            value = getattr(vital, "value", vital.get("value", None))
+    def row_thresholds(self, profile_rows, patient_index, sensor_codes):
+        """Per-row (low, high) for a columnar block: two lookups into the profile table."""
+        table = self.profiles.table()
+        rows = profile_rows[patient_index]
+        return table.low[rows, sensor_codes], table.high[rows, sensor_codes]
 
-            # Special handling for BP in "120/80" format
-            if sensor_type in ["bp", "blood_pressure"] and isinstance(value, str) and "/" in value:
-                try:
-                    sys_val, dia_val = map(int, value.split("/"))
-                    if sys_val < self.thresholds["bp_systolic"][0] or sys_val > self.thresholds["bp_systolic"][1]:
-                        alerts.append(f"Systolic BP out of range: {sys_val}")
-                    if dia_val < self.thresholds["bp_diastolic"][0] or dia_val > self.thresholds["bp_diastolic"][1]:
-                        alerts.append(f"Diastolic BP out of range: {dia_val}")
-                except ValueError:
-                    pass
-            else:
-                # Normal vital check
-                if sensor_type in self.thresholds and value is not None:
-                    low, high = self.thresholds[sensor_type]
+    # ---------- batch evaluation ----------
+
+    def to_columns(self, twins):
+        """Flatten {patient_id: twin} into columns.
+
+        Returns patient_ids, then per row: patient index, sensor code, value,
+        display value, timestamp (epoch ns, now if missing) and the label
+        used in alert messages. "120/80" style BP readings become a
+        systolic and a diastolic row.
+        """
+        patient_ids, index, codes, values, display, stamps, names = [], [], [], [], [], [], []
+        aliases = self.SENSOR_ALIASES
+        now_ns = None
+        for pid, twin in twins.items():
+            p = len(patient_ids)
+            patient_ids.append(pid)
+            for vital in (twin or {}).get("vitals", []):
+                # Extract sensor type + value from dict or object
+                if isinstance(vital, dict):
+                    sensor_type, value, ts = vital.get("sensor_type", ""), vital.get("value"), vital.get("timestamp")
+                else:
+                    sensor_type, value = getattr(vital, "sensor_type", ""), getattr(vital, "value", None)
+                    ts = getattr(vital, "timestamp", None)
+                sensor_type = (sensor_type or "").lower()
+
+                # Special handling for BP in "120/80" format
+                if sensor_type in ("bp", "blood_pressure") and isinstance(value, str) and "/" in value:
                     try:
-                        if float(value) < low or float(value) > high:
-                            alerts.append(f"{sensor_type.capitalize()} out of range: {value}")
+                        sys_val, dia_val = map(int, value.split("/"))
                     except ValueError:
-                        pass
+                        continue
+                    index += [p, p]
+                    codes += [SENSOR_CODES["BP_SYS"], SENSOR_CODES["BP_DIA"]]
+                    values += [sys_val, dia_val]
+                    display += [sys_val, dia_val]
+                    names += ["Systolic BP", "Diastolic BP"]
+                    if ts is None:
+                        now_ns = now_ns or timestamp_ns(datetime.now())
+                    stamps += [now_ns if ts is None else timestamp_ns(ts)] * 2
+                    continue
+
+                code = aliases.get(sensor_type)
+                if code is None or value is None:
+                    continue
+                try:
+                    number = float(value)
+                except (TypeError, ValueError):
+                    continue
+                index.append(p)
+                codes.append(code)
+                values.append(number)
+                display.append(value)
+                names.append(sensor_type.capitalize())
+                if ts is None:
+                    now_ns = now_ns or timestamp_ns(datetime.now())
+                stamps.append(now_ns if ts is None else timestamp_ns(ts))
+        return (patient_ids, np.asarray(index, dtype=np.int64), np.asarray(codes, dtype=np.int64),
+                np.asarray(values, dtype=np.float64), display, np.asarray(stamps, dtype=np.int64), names)
+
+    def evaluate_columns(self, patient_index, sensor_codes, values, profile_rows=None):
+        """Indices of out-of-range rows in a columnar block, in one NumPy pass.
+
+        ``profile_rows`` gives each patient's threshold profile row (see
+        ``profile_rows``); without it every patient uses the global ranges.
+        """
+        if profile_rows is None:
+            low, high = self.threshold_arrays()
+            low, high = low[sensor_codes], high[sensor_codes]
+        else:
+            low, high = self.row_thresholds(profile_rows, patient_index, sensor_codes)
+        return np.flatnonzero((values < low) | (values > high))
+
+    def profile_rows(self, patient_ids, twins=None):
+        """Threshold profile row per patient; a twin's ``ward`` key picks the ward profile."""
+        wards = [(twins.get(pid) or {}).get("ward") for pid in patient_ids] if twins else None
+        return self.profiles.table().rows(patient_ids, wards)
 
-        # Store alerts for this patient
-        if alerts:
-            self.alerts[patient_id] = alerts
-            return {
+    def generate_alerts(self, twins):
+        """Evaluate {patient_id: twin} for the whole ward at once; returns {patient_id: alert} for alerting patients."""
+        patient_ids, index, codes, values, display, stamps, names = self.to_columns(twins)
+        profile_rows = self.profile_rows(patient_ids, twins)
+        if self.rules is not None:
+            return self._apply_rules(patient_ids, index, codes, values, stamps, profile_rows)
+        rows = self.evaluate_columns(index, codes, values, profile_rows)
+
+        messages = {}
+        new_alert = set()
+        labels = self.LABELS
+        for row, p, code in zip(rows.tolist(), index[rows].tolist(), codes[rows].tolist()):
+            message = f"{names[row]} out of range: {display[row]}"
+            messages.setdefault(patient_ids[p], []).append(message)
+            if self.history.raise_alert(patient_ids[p], labels[code], message)["count"] == 1:
+                new_alert.add(patient_ids[p])
+        self._resolve_cleared(patient_ids, index, codes, rows)
+        self._sync_alerts(patient_ids)
+
+        results = {}
+        for pid, alerts in messages.items():
+            results[pid] = {
                 "title": "🚨 Alert",
                 "message": "\n".join(alerts)
             }
-        return None
+            if self.notifier is not None:
+                # Repeats of an already open alert are shed first under load
+                self.notifier.notify(pid, "🚨 Alert", alerts,
+                                     "high" if pid in new_alert else "low")
+        return results
+
+    def _apply_rules(self, patient_ids, index, codes, values, stamps, profile_rows):
+        """Streaming mode: alert when a rule enters; keep ``alerts`` to the rules still active."""
+        low, high = self.row_thresholds(profile_rows, index, codes)
+        events = self.rules.update_columns(patient_ids, index, codes, values, stamps, low, high)
+
+        entered = {}
+        for event in events:
+            pid, rule = event["patient_id"], event["rule"]
+            if event["event"] == "enter":
+                message = f"{rule.description}: {event['value']:g}"
+                entered.setdefault(pid, []).append(message)
+                self.history.raise_alert(pid, rule.name, message, sensor=self.LABELS[rule.code])
+            else:
+                self.history.resolve_source(pid, rule.name)
+        self._sync_alerts({event["patient_id"] for event in events})
+
+        results = {
+            pid: {"title": "🚨 Alert", "message": "\n".join(messages)}
+            for pid, messages in entered.items()
+        }
+        if self.notifier is not None:
+            for pid, result in results.items():
+                self.notifier.notify(pid, result["title"], entered[pid], "high")
+        return results
+
+    def _resolve_cleared(self, patient_ids, index, codes, alert_rows):
+        """Resolve open alerts whose sensor's latest reading in the block is back in range."""
+        if not len(index):
+            return
+        stride = max(SENSOR_CODES.values()) + 1
+        keys = index * stride + codes
+        out = np.zeros(len(keys), dtype=bool)
+        out[alert_rows] = True
+        # Last reading per (patient, sensor): first occurrence in the reversed block
+        keys_rev, out_rev = keys[::-1], out[::-1]
+        unique_keys, first = np.unique(keys_rev, return_index=True)
+        for key in unique_keys[~out_rev[first]].tolist():
+            pid = patient_ids[key // stride]
+            if pid in self.alerts:
+                self.history.resolve_source(pid, self.LABELS[key % stride])
+
+    def _sync_alerts(self, patient_ids):
+        for pid in patient_ids:
+            opened = self.history.open_alerts(pid)
+            if opened:
+                self.alerts[pid] = [alert["message"] for alert in opened]
+            else:
+                self.alerts.pop(pid, None)
+
+    def generate_alert(self, patient_id, twin, predictions):
+        return self.generate_alerts({patient_id: twin}).get(patient_id)
+
+    # ---------- lifecycle ----------
+
+    def acknowledge_alert(self, alert_id, by=None):
+        return self.history.acknowledge(alert_id, by)
+
+    def resolve_alert(self, alert_id):
+        alert = self.history.resolve(alert_id)
+        if alert is None:
+            return False
+        self._sync_alerts([alert["patient_id"]])
+        return True
+
+    def close(self):
+        """Deliver pending notifications and stop the dispatcher threads."""
+        if self.notifier is not None:
+            self.notifier.close()
 
     def get_alert_statistics(self):
+        stats = self.history.get_statistics()
         return {
-            "active_alerts": len(self.alerts)
+            "active_alerts": stats["open"],
+            "unacknowledged_alerts": stats["active"],
+            "acknowledged_alerts": stats["acknowledged"],
+            "resolved_alerts": stats["resolved"],
+            "total_alerts": stats["raised"],
+            "alerts_by_sensor": stats["by_sensor"],
+            "active_by_sensor": stats["open_by_sensor"],
+            "alerts_last_hour": stats["alerts_last_hour"],
+            "mean_time_to_resolve_s": stats["mean_time_to_resolve_s"]
         }
@@ -0,0 +1,346 @@
+import csv
+import glob
+import io
+import json
+import os
+import threading
+
+import pandas as pd
+
+from .LogFileGrowth import LogFileGrowth
+from .VitalsStore import VitalsStore
+
+
+class AppendOnlyStore(VitalsStore):
+    """Append-only CSV segment log with periodic compaction into a base file.
+
+    New rows are appended to the active segment (the write-ahead log), so a
+    write costs O(rows written) no matter how much history exists. Full
+    segments are sealed, and once enough have piled up they are compacted by
+    appending their bodies onto the base CSV and deleting them.
+
+    Rows other processes append to the same files are picked up by
+    ``external_rows``; a compaction done elsewhere is reported as a rewrite.
+    """
+
+    SEGMENT_PATTERN = "segment-*.csv"
+
+    def __init__(self, directory, columns, base_path=None, segment_max_rows=10000,
+                 compact_after=8, fsync=False, growth=None):
+        self.directory = directory
+        self.columns = list(columns)
+        self.base_path = base_path or os.path.join(directory, "base.csv")
+        self.segment_max_rows = segment_max_rows
+        self.compact_after = compact_after
+        self.fsync = fsync
+
+        self._lock = threading.RLock()
+        self._file = None
+        self._writer = None
+        self._active_path = None
+        self._rows_in_segment = 0
+        # Bytes of each file already seen (a PartitionedStore shares one across its partitions)
+        self._growth = growth or LogFileGrowth()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._recover_compaction()
+        self._open_active_segment()
+        if growth is None:
+            self._growth.rebase(self._files())
+
+    # ---------- segment bookkeeping ----------
+
+    @classmethod
+    def segment_paths(cls, directory):
+        return sorted(glob.glob(os.path.join(directory, cls.SEGMENT_PATTERN)))
+
+    def _segments(self):
+        return self.segment_paths(self.directory)
+
+    def _files(self):
+        return ([self.base_path] if os.path.exists(self.base_path) else []) + self._segments()
+
+    def _segment_path(self, seq):
+        return os.path.join(self.directory, f"segment-{seq:08d}.csv")
+
+    def _next_seq(self):
+        segments = self._segments()
+        if not segments:
+            return 1
+        last = os.path.basename(segments[-1])
+        return int(last[len("segment-"):-len(".csv")]) + 1
+
+    def _open_active_segment(self):
+        """Reopen the newest segment if it has room, otherwise start a new one."""
+        segments = self._segments()
+        if segments:
+            path = segments[-1]
+            rows = self._truncate_partial_row(path)
+            # Only keep appending if the segment was written with the current columns
+            if rows < self.segment_max_rows and self._header(path) == self.columns:
+                self._attach(path, rows, write_header=False)
+                return
+        self._attach(self._segment_path(self._next_seq()), 0, write_header=True)
+
+    def _attach(self, path, rows, write_header):
+        self._active_path = path
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._rows_in_segment = rows
+        if write_header:
+            self._writer.writerow(self.columns)
+            self._sync_written()
+
+    @staticmethod
+    def _truncate_partial_row(path):
+        """Drop a torn trailing row left by a crash; return the data row count."""
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                cut = data.rfind(b"\n") + 1
+                f.truncate(cut)
+                data = data[:cut]
+        return max(data.count(b"\n") - 1, 0)
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _sync_written(self):
+        """Sync after our own write and count the file's bytes as seen."""
+        self._sync()
+        self._growth.wrote(self._active_path, os.fstat(self._file.fileno()).st_size)
+
+    def _roll(self):
+        """Seal the active segment and open a fresh one."""
+        self._file.close()
+        if len(self._segments()) >= self.compact_after:
+            self._compact_sealed(self._segments())
+        self._attach(self._segment_path(self._next_seq()), 0, write_header=True)
+
+    # ---------- writes ----------
+
+    def append(self, rows):
+        """Append an iterable of row dicts to the log."""
+        with self._lock:
+            self._growth.catch_up(self._active_path)
+            for row in rows:
+                self._writer.writerow([row.get(col) for col in self.columns])
+                self._rows_in_segment += 1
+                if self._rows_in_segment >= self.segment_max_rows:
+                    self._sync_written()
+                    self._roll()
+            self._sync_written()
+
+    def replace(self, df):
+        """Replace the whole dataset with ``df`` (used by full rewrites)."""
+        with self._lock:
+            self._file.close()
+            os.makedirs(os.path.dirname(self.base_path) or ".", exist_ok=True)
+            self._swap_base(df, self._segments())
+            self._growth.forget(self.directory, self.base_path)
+            self._attach(self._segment_path(1), 0, write_header=True)
+            self._growth.rebase(self._files())
+
+    # ---------- compaction ----------
+
+    @property
+    def _marker_path(self):
+        return os.path.join(self.directory, "compaction.json")
+
+    def compact(self):
+        """Fold every sealed segment into the base file."""
+        with self._lock:
+            self._sync()
+            self._file.close()
+            self._compact_sealed(self._segments())
+            self._attach(self._segment_path(self._next_seq()), 0, write_header=True)
+
+    def _compact_sealed(self, segments):
+        if not segments:
+            return
+        # Rows others appended are set aside first; afterwards the new files are the baseline
+        for path in segments:
+            self._growth.catch_up(path)
+        self._compact_files(segments)
+        self._growth.forget(self.directory, self.base_path, keep_found=True)
+        self._growth.rebase(self._files())
+
+    def _compact_files(self, segments):
+        if not self._base_matches_schema() or any(self._header(p) != self.columns for p in segments):
+            self._rewrite_base(segments)
+            return
+
+        # Record what we are about to do so a crash mid-way can be rolled back
+        base_size = os.path.getsize(self.base_path) if os.path.exists(self.base_path) else 0
+        self._write_marker({"mode": "append", "base_size": base_size, "segments": segments})
+
+        with open(self.base_path, "ab") as base:
+            if base_size == 0:
+                base.write(self._header_bytes())
+            for path in segments:
+                with open(path, "rb") as seg:
+                    seg.readline()  # skip header
+                    while True:
+                        chunk = seg.read(1 << 20)
+                        if not chunk:
+                            break
+                        base.write(chunk)
+            base.flush()
+            os.fsync(base.fileno())
+        self._sync_directory()
+
+        # The base now holds every row: from here on recovery finishes instead of rolling back
+        self._write_marker({"mode": "append", "base_size": base_size, "segments": segments, "committed": True})
+        for path in segments:
+            os.remove(path)
+        os.remove(self._marker_path)
+
+    def _write_marker(self, marker):
+        """Write the compaction marker atomically (tmp file, fsync, rename)."""
+        tmp_path = self._marker_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(marker, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._marker_path)
+        self._sync_directory()
+
+    def _sync_directory(self):
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return  # not supported on this platform
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _recover_compaction(self):
+        """Finish or undo a compaction or base rewrite that was interrupted."""
+        for leftover in (self._marker_path + ".tmp", self.base_path + ".tmp"):
+            if os.path.exists(leftover) and not os.path.exists(self._marker_path):
+                os.remove(leftover)  # crashed before the marker was written; nothing changed yet
+        if not os.path.exists(self._marker_path):
+            return
+        with open(self._marker_path, encoding="utf-8") as f:
+            marker = json.load(f)
+        if marker.get("mode") == "rewrite":
+            tmp_path = self.base_path + ".tmp"
+            if os.path.exists(tmp_path):
+                # The new base never replaced the old one, so the segments are still needed
+                os.remove(tmp_path)
+            else:
+                for path in marker["segments"]:
+                    if os.path.exists(path):
+                        os.remove(path)
+        elif not marker.get("committed") and all(os.path.exists(p) for p in marker["segments"]):
+            # The append may be partial: cut the base back (one created by the compaction goes away)
+            if os.path.exists(self.base_path):
+                if marker["base_size"]:
+                    with open(self.base_path, "rb+") as base:
+                        base.truncate(marker["base_size"])
+                else:
+                    os.remove(self.base_path)
+        else:
+            # The append completed and segments were being removed
+            for path in marker["segments"]:
+                if os.path.exists(path):
+                    os.remove(path)
+        os.remove(self._marker_path)
+
+    def _header_bytes(self):
+        buf = io.StringIO()
+        csv.writer(buf).writerow(self.columns)
+        return buf.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _header(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), [])
+
+    def _base_matches_schema(self):
+        if not os.path.exists(self.base_path) or os.path.getsize(self.base_path) == 0:
+            return True
+        return self._header(self.base_path) == self.columns
+
+    def _rewrite_base(self, segments):
+        """One-off rewrite when the base file predates the current column layout."""
+        paths = ([self.base_path] if os.path.exists(self.base_path) else []) + segments
+        frames = [self._read_csv(p) for p in paths]
+        df = pd.concat(frames, ignore_index=True)
+        for col in self.columns:
+            if col not in df.columns:
+                df[col] = None
+        self._swap_base(df[self.columns], segments)
+
+    def _swap_base(self, df, segments):
+        """Replace the base file with ``df`` and delete ``segments``, recoverably.
+
+        The new base is written and synced to a tmp file first; the marker
+        then records the segments, so after a crash recovery either keeps
+        them (the tmp file is still there) or finishes deleting them.
+        """
+        tmp_path = self.base_path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_marker({"mode": "rewrite", "segments": segments})
+        os.replace(tmp_path, self.base_path)
+        self._sync_directory()
+        for path in segments:
+            os.remove(path)
+        os.remove(self._marker_path)
+
+    # ---------- reads ----------
+
+    @staticmethod
+    def _read_csv(path):
+        try:
+            return pd.read_csv(path)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame()
+
+    @classmethod
+    def read_directory(cls, directory, columns, base_path=None):
+        """Read a store's files without opening it for writing."""
+        base_path = base_path or os.path.join(directory, "base.csv")
+        paths = [base_path] if os.path.exists(base_path) else []
+        paths += cls.segment_paths(directory)
+        frames = [df for df in (cls._read_csv(p) for p in paths) if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def read_all(self):
+        """Return base file plus every segment as one DataFrame."""
+        with self._lock:
+            self._sync()
+            return self.read_directory(self.directory, self.columns, self.base_path)
+
+    def read_recent(self):
+        """Every row; ``external_rows`` reports what others append after this read."""
+        with self._lock:
+            self._sync()
+            self._growth.forget(self.directory, self.base_path)
+            self._growth.rebase(self._files())
+            return self.read_directory(self.directory, self.columns, self.base_path)
+
+    def external_rows(self, patient_id=None):
+        with self._lock:
+            self._sync()
+            frames = self._growth.scan(self.directory, self.base_path, self._segments())
+        if frames is None:
+            return None
+        frames = [df for df in frames if not df.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=self.columns)
+
+    def close(self):
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._sync()
+                self._file.close()
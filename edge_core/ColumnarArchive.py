@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import threading
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from .VitalsStore import SENSOR_CODES
+
+
+class ColumnarArchive:
+    """Sealed vitals kept as fixed-dtype column files opened with numpy.memmap.
+
+    Each seal writes one segment per patient under ``<root>/<patient>/seg-<until_ns>/``
+    holding ``timestamp`` (int64 epoch ns), ``sensor`` (int8 code), ``value``
+    (float64) and ``quality`` (float32) columns, sorted by (sensor, timestamp).
+    Segments only ever cover (previous watermark, until_ns], so a patient's
+    segments are disjoint in time and a range scan is a binary search per
+    segment.
+    """
+
+    DTYPES = {
+        "timestamp": np.int64,
+        "sensor": np.int8,
+        "value": np.float64,
+        "quality": np.float32
+    }
+
+    def __init__(self, root):
+        self.root = root
+        self._manifest_path = os.path.join(root, "archive.json")
+        self._lock = threading.Lock()
+        self._open_segments = {}
+        os.makedirs(root, exist_ok=True)
+        self.sealed_until = self._read_manifest()
+        self._discard_unfinished()
+
+    # ---------- manifest ----------
+
+    def _read_manifest(self):
+        if not os.path.exists(self._manifest_path):
+            return None
+        with open(self._manifest_path, encoding="utf-8") as f:
+            return json.load(f).get("sealed_until")
+
+    def _write_manifest(self, sealed_until):
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"sealed_until": sealed_until}, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _discard_unfinished(self):
+        """Remove segments from a seal that crashed before updating the manifest."""
+        staging = os.path.join(self.root, ".staging")
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+        for patient_dir in self._patient_dirs():
+            for name in os.listdir(patient_dir):
+                if self._segment_until(name) > (self.sealed_until or -1):
+                    shutil.rmtree(os.path.join(patient_dir, name))
+
+    # ---------- layout helpers ----------
+
+    def _patient_dir(self, patient_id):
+        return os.path.join(self.root, quote(str(patient_id), safe=""))
+
+    def _patient_dirs(self):
+        return [
+            os.path.join(self.root, name) for name in os.listdir(self.root)
+            if not name.startswith(".") and os.path.isdir(os.path.join(self.root, name))
+        ]
+
+    @staticmethod
+    def _segment_until(name):
+        return int(name[len("seg-"):])
+
+    def _segment_dirs(self, patient_id):
+        patient_dir = self._patient_dir(patient_id)
+        if not os.path.isdir(patient_dir):
+            return []
+        names = sorted(os.listdir(patient_dir), key=self._segment_until)
+        return [os.path.join(patient_dir, name) for name in names]
+
+    # ---------- sealing ----------
+
+    def seal(self, df, until_ns):
+        """Seal rows of ``df`` with sealed_until < timestamp <= until_ns into new segments.
+
+        ``df`` is a frame in DataManager's row layout. Non-numeric values
+        (e.g. "120/80" strings) are stored as NaN. Returns rows sealed.
+        """
+        with self._lock:
+            lower = self.sealed_until if self.sealed_until is not None else np.iinfo(np.int64).min
+            if until_ns <= lower:
+                return 0
+
+            ts = pd.to_datetime(df["timestamp"], errors="coerce")
+            keep = ts.notna()
+            ts_ns = ts[keep].astype("int64")
+            frame = pd.DataFrame({
+                "patient_id": df.loc[keep, "patient_id"],
+                "timestamp": ts_ns,
+                "sensor": df.loc[keep, "sensor"].map(SENSOR_CODES).fillna(0).astype(np.int8),
+                "value": pd.to_numeric(df.loc[keep, "value"], errors="coerce"),
+                "quality": pd.to_numeric(df.loc[keep, "quality_score"], errors="coerce")
+                if "quality_score" in df.columns else np.nan
+            })
+            frame = frame[(frame["timestamp"] > lower) & (frame["timestamp"] <= until_ns)]
+
+            staging = os.path.join(self.root, ".staging")
+            os.makedirs(staging, exist_ok=True)
+            name = f"seg-{until_ns}"
+            for patient_id, rows in frame.groupby("patient_id", sort=False):
+                rows = rows.sort_values(["sensor", "timestamp"], kind="stable")
+                seg_dir = os.path.join(staging, quote(str(patient_id), safe=""))
+                os.makedirs(seg_dir)
+                for col, dtype in self.DTYPES.items():
+                    np.save(os.path.join(seg_dir, f"{col}.npy"), rows[col].to_numpy(dtype=dtype))
+                codes = rows["sensor"].to_numpy()
+                offsets = {
+                    int(code): [int(np.searchsorted(codes, code, "left")),
+                                int(np.searchsorted(codes, code, "right"))]
+                    for code in np.unique(codes)
+                }
+                with open(os.path.join(seg_dir, "meta.json"), "w", encoding="utf-8") as f:
+                    json.dump({"patient_id": str(patient_id), "offsets": offsets}, f)
+
+            for entry in os.listdir(staging):
+                patient_dir = os.path.join(self.root, entry)
+                os.makedirs(patient_dir, exist_ok=True)
+                os.replace(os.path.join(staging, entry), os.path.join(patient_dir, name))
+            os.rmdir(staging)
+
+            self._write_manifest(until_ns)
+            self.sealed_until = until_ns
+            return len(frame)
+
+    # ---------- reads ----------
+
+    def _open(self, seg_dir):
+        seg = self._open_segments.get(seg_dir)
+        if seg is None:
+            with open(os.path.join(seg_dir, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            seg = {col: np.load(os.path.join(seg_dir, f"{col}.npy"), mmap_mode="r") for col in self.DTYPES}
+            seg["offsets"] = {int(k): v for k, v in meta["offsets"].items()}
+            self._open_segments[seg_dir] = seg
+        return seg
+
+    def read_range(self, patient_id, sensor, start=None, end=None):
+        """Return {"timestamp", "value", "quality"} arrays for start <= ts <= end.
+
+        ``start``/``end`` are epoch nanoseconds. When the range falls inside a
+        single segment the arrays are read-only views straight into the
+        memory-mapped files; ranges spanning segments are concatenated.
+        """
+        code = SENSOR_CODES.get(sensor, 0)
+        parts = []
+        for seg_dir in self._segment_dirs(patient_id):
+            seg = self._open(seg_dir)
+            if code not in seg["offsets"]:
+                continue
+            a, b = seg["offsets"][code]
+            ts = seg["timestamp"][a:b]
+            lo = a if start is None else a + int(np.searchsorted(ts, start, "left"))
+            hi = b if end is None else a + int(np.searchsorted(ts, end, "right"))
+            if hi > lo:
+                parts.append((seg, lo, hi))
+
+        if len(parts) == 1:
+            seg, lo, hi = parts[0]
+            return {col: seg[col][lo:hi] for col in ("timestamp", "value", "quality")}
+        return {
+            col: np.concatenate([seg[col][lo:hi] for seg, lo, hi in parts])
+            if parts else np.empty(0, dtype=self.DTYPES[col])
+            for col in ("timestamp", "value", "quality")
+        }
+
+    def close(self):
+        with self._lock:
+            self._open_segments.clear()
@@ -0,0 +1,228 @@
+import hashlib
+import io
+import json
+
+import numpy as np
+
+
+class CompiledModel:
+    """Dependency-free scorer for the vitals model, stored as plain NumPy arrays.
+
+    ``from_estimator`` compiles a fitted linear model (``coef_``/``intercept_``)
+    or a tree ensemble (scikit-learn decision trees, random forests / extra
+    trees, squared-error gradient boosting, or an XGBoost ``reg:squarederror``
+    booster) into flat arrays that ``save`` writes to a ``.npz`` file.
+    ``load`` and ``predict`` only need NumPy, so edge devices can score
+    without importing scikit-learn or xgboost. Evaluation reproduces each
+    library's arithmetic (dtypes, split comparison, summation order), so
+    predictions are bit-for-bit identical to the original estimator.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, kind, arrays, meta):
+        self.kind = kind
+        self.arrays = arrays
+        self.meta = meta
+        self.feature_names = meta.get("feature_names")
+
+    # ---------- compile ----------
+
+    @classmethod
+    def from_estimator(cls, model, feature_names=None, source_sha256=None):
+        if feature_names is None and hasattr(model, "feature_names_in_"):
+            feature_names = [str(name) for name in model.feature_names_in_]
+        meta = {"feature_names": list(feature_names) if feature_names is not None else None,
+                "source_sha256": source_sha256, "estimator": type(model).__name__}
+
+        if hasattr(model, "get_booster"):
+            model = model.get_booster()
+        if type(model).__name__ == "Booster":
+            kind, arrays, extra = cls._compile_xgboost(model)
+        elif hasattr(model, "estimators_") or hasattr(model, "tree_"):
+            kind, arrays, extra = cls._compile_sklearn_trees(model)
+        elif hasattr(model, "coef_") and hasattr(model, "intercept_"):
+            coef = np.asarray(model.coef_, dtype=np.float64)
+            if coef.ndim != 1:
+                raise ValueError("Only single-output linear models can be compiled")
+            kind, arrays, extra = "linear", {"coef": coef, "intercept": np.float64(model.intercept_)}, {}
+        else:
+            raise ValueError(f"Don't know how to compile {type(model).__name__}")
+        meta.update(extra)
+        return cls(kind, arrays, meta)
+
+    @classmethod
+    def _compile_sklearn_trees(cls, model):
+        name = type(model).__name__
+        if hasattr(model, "tree_"):
+            trees, combine, extra = [model], "sum", {}
+        elif name in ("RandomForestRegressor", "ExtraTreesRegressor"):
+            trees, combine, extra = list(model.estimators_), "mean", {}
+        elif name == "GradientBoostingRegressor":
+            if getattr(model, "loss", "squared_error") not in ("squared_error", "ls"):
+                raise ValueError("Only squared-error gradient boosting can be compiled")
+            if model.init_ == "zero":
+                init = 0.0
+            elif hasattr(model.init_, "constant_"):
+                init = float(np.asarray(model.init_.constant_).ravel()[0])
+            else:
+                raise ValueError("Gradient boosting with a non-constant init estimator can't be compiled")
+            trees = [stage[0] for stage in model.estimators_]
+            combine, extra = "boost", {"init": init, "learning_rate": float(model.learning_rate)}
+        else:
+            raise ValueError(f"Don't know how to compile {name}")
+
+        nodes = []
+        for tree in trees:
+            t = tree.tree_
+            nodes.append((t.feature, t.threshold, t.children_left, t.children_right, t.value[:, 0, 0], None))
+        arrays = cls._pack_trees(nodes, threshold_dtype=np.float64, value_dtype=np.float64)
+        extra.update({"combine": combine, "split": "le", "input_dtype": "float32"})
+        return "trees", arrays, extra
+
+    @classmethod
+    def _compile_xgboost(cls, booster):
+        config = json.loads(booster.save_config())
+        learner = config["learner"]
+        if learner["objective"]["name"] != "reg:squarederror":
+            raise ValueError("Only reg:squarederror XGBoost models can be compiled")
+        if learner["gradient_booster"]["name"] != "gbtree":
+            raise ValueError("Only gbtree XGBoost models can be compiled")
+        base_score = float(learner["learner_model_param"]["base_score"])
+
+        model = json.loads(bytes(booster.save_raw(raw_format="json")))
+        nodes = []
+        for tree in model["learner"]["gradient_booster"]["model"]["trees"]:
+            left = np.asarray(tree["left_children"])
+            # Leaves store their weight in split_conditions
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float64)
+            nodes.append((np.asarray(tree["split_indices"]), conditions, left, np.asarray(tree["right_children"]),
+                          conditions, np.asarray(tree["default_left"], dtype=bool)))
+        arrays = cls._pack_trees(nodes, threshold_dtype=np.float32, value_dtype=np.float32)
+        return "trees", arrays, {"combine": "xgboost", "split": "lt", "input_dtype": "float32",
+                                 "base_score": base_score}
+
+    @staticmethod
+    def _pack_trees(nodes, threshold_dtype, value_dtype):
+        """Concatenate trees into flat arrays; leaves point at themselves."""
+        feature, threshold, left, right, value, default_left, roots = [], [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for f, thr, lc, rc, val, dleft in nodes:
+            n = len(lc)
+            own = np.arange(n)
+            leaf = np.asarray(lc) < 0
+            roots.append(offset)
+            feature.append(np.where(leaf, 0, f).astype(np.int32))
+            threshold.append(np.where(leaf, 0, thr).astype(threshold_dtype))
+            left.append((np.where(leaf, own, lc) + offset).astype(np.int32))
+            right.append((np.where(leaf, own, rc) + offset).astype(np.int32))
+            value.append(np.where(leaf, val, 0).astype(value_dtype))
+            default_left.append(np.zeros(n, dtype=bool) if dleft is None else dleft)
+            depth = max(depth, CompiledModel._depth(np.asarray(lc), np.asarray(rc)))
+            offset += n
+        return {
+            "feature": np.concatenate(feature), "threshold": np.concatenate(threshold),
+            "left": np.concatenate(left), "right": np.concatenate(right),
+            "value": np.concatenate(value), "default_left": np.concatenate(default_left),
+            "roots": np.asarray(roots, dtype=np.int32), "max_depth": np.int32(depth)
+        }
+
+    @staticmethod
+    def _depth(left, right):
+        depth, frontier = 0, [0]
+        while True:
+            children = [c for node in frontier for c in (left[node], right[node]) if c >= 0]
+            if not children:
+                return depth
+            depth += 1
+            frontier = children
+
+    # ---------- persistence ----------
+
+    def save(self, path):
+        meta = dict(self.meta, kind=self.kind, format_version=self.FORMAT_VERSION)
+        with open(path, "wb") as f:
+            np.savez(f, _meta=np.array(json.dumps(meta)), **self.arrays)
+
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            meta = json.loads(str(npz["_meta"]))
+            arrays = {key: npz[key] for key in npz.files if key != "_meta"}
+        if meta.get("format_version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format {meta.get('format_version')}")
+        return cls(meta.pop("kind"), arrays, meta)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    @staticmethod
+    def read_meta(path):
+        """Metadata of a saved artifact (feature names, source hash, ...) without loading the arrays."""
+        with np.load(path, allow_pickle=False) as npz:
+            return json.loads(str(npz["_meta"]))
+
+    @staticmethod
+    def file_sha256(path):
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @classmethod
+    def export(cls, model_path, output_path, feature_names=None):
+        """Compile a pickled estimator to ``output_path`` (this step needs the ML stack)."""
+        import pickle
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+        compiled = cls.from_estimator(model, feature_names, source_sha256=cls.file_sha256(model_path))
+        compiled.save(output_path)
+        return compiled
+
+    # ---------- scoring ----------
+
+    def predict(self, X):
+        if hasattr(X, "columns") and self.feature_names is not None:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if self.kind == "linear":
+            return X @ self.arrays["coef"] + self.arrays["intercept"]
+
+        a = self.arrays
+        leaves = self._leaf_values(X.astype(np.float32) if self.meta["input_dtype"] == "float32" else X)
+        combine = self.meta["combine"]
+        if combine == "xgboost":
+            out = np.full(len(X), self.meta["base_score"], dtype=np.float32)
+            for t in range(leaves.shape[1]):
+                out += leaves[:, t]
+            return out
+        if combine == "boost":
+            out = np.full(len(X), self.meta["init"], dtype=np.float64)
+            rate = self.meta["learning_rate"]
+            for t in range(leaves.shape[1]):
+                out += rate * leaves[:, t]
+            return out
+        out = np.zeros(len(X), dtype=np.float64)
+        for t in range(leaves.shape[1]):
+            out += leaves[:, t]
+        if combine == "mean":
+            out /= len(a["roots"])
+        return out
+
+    def _leaf_values(self, X):
+        """(n_samples, n_trees) leaf values, walking every tree for every row at once."""
+        a = self.arrays
+        nodes = np.repeat(a["roots"][None, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, None]
+        less_than = self.meta["split"] == "lt"
+        for _ in range(int(a["max_depth"])):
+            x = X[rows, a["feature"][nodes]]
+            threshold = a["threshold"][nodes]
+            go_left = x < threshold if less_than else x <= threshold
+            go_left = np.where(np.isnan(x), a["default_left"][nodes], go_left)
+            nodes = np.where(go_left, a["left"][nodes], a["right"][nodes])
+        return a["value"][nodes]
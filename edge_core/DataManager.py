@@ -1,7 +1,30 @@
+import atexit
+import numpy as np
 import pandas as pd
 import os
+import threading
+import weakref
 from datetime import datetime
 
+from .AppendOnlyStore import AppendOnlyStore
+from .ColumnarArchive import ColumnarArchive
+from .PartitionedStore import PartitionedStore
+from .SQLiteStore import SQLiteStore
+from .VitalsRingIndex import VitalsRingIndex
+from .VitalsRollups import VitalsRollups
+from .VitalsStore import timestamp_ns
+
+# Managers still open at interpreter exit get flushed and closed (held weakly, so
+# per-session instances can still be garbage collected)
+_open_managers = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_managers():
+    for data_manager in list(_open_managers):
+        data_manager.close()
+
+
 class DataManager:
     """Handles data loading, saving, and vital history."""
 
@@ -9,43 +32,123 @@ class DataManager:
         self.data_path = config.data_path
         self.vitals_history = {}
         self.feature_columns = ["heart_rate", "bp_systolic", "bp_diastolic", "oxygen_saturation", "temperature"]
+        self.base_columns = ["patient_id", "timestamp", "sensor", "value"] + self.feature_columns + ["quality_score"]
+
+        self.store = self._open_store(config)
+
+        # Group commit: readings are buffered and written in one append per flush
+        self.group_commit = config.group_commit
+        self.commit_max_rows = config.commit_max_rows
+        self.commit_max_wait = config.commit_max_wait
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Held while readings go into the in-memory views and the store (or buffer), so a
+        # view rebuilt from the store never misses or double-counts a reading
+        self._write_lock = threading.RLock()
+        self._stop = threading.Event()
+        self._flusher = None
+        if self.group_commit:
+            self._flusher = threading.Thread(target=self._flush_loop, name="vitals-group-commit", daemon=True)
+            self._flusher.start()
+        # Background compaction / retention
+        self._maintainer = None
+        if config.maintenance_interval:
+            self._maintainer = threading.Thread(
+                target=self._maintenance_loop, args=(config.maintenance_interval,),
+                name="vitals-maintenance", daemon=True
+            )
+            self._maintainer.start()
+
+        # Older data can be sealed into memory-mapped column files for long scans
+        self.archive = ColumnarArchive(os.path.splitext(self.data_path)[0] + "_columnar")
+
+        # In-memory views warmed once and then maintained on write: the "last N"
+        # ring index and per-minute / per-hour rollups
+        self.index = VitalsRingIndex(config.history_depth)
+        self.rollups = VitalsRollups()
+        self._warm_views()
+        _open_managers.add(self)
+
+    def _warm_views(self):
+        recent = self._with_columns(self.store.read_recent())
+        self.index.warm(recent, complete=self.store.recent_is_complete)
+        self.rollups.warm(recent, complete=self.store.recent_is_complete)
+
+    def _open_store(self, config):
+        """Build the storage backend selected by ``config.storage_backend``."""
+        if config.storage_backend == "sqlite":
+            store = SQLiteStore(config.db_path, self.base_columns, fsync=config.fsync, warm_rows=config.warm_rows)
+        elif config.storage_backend == "partitioned":
+            store = PartitionedStore(
+                os.path.splitext(self.data_path)[0] + "_partitions",
+                self.base_columns,
+                partition_hours=config.partition_hours,
+                patient_groups=config.patient_groups,
+                retention_days=config.retention_days,
+                archive_expired=config.archive_expired,
+                segment_max_rows=config.segment_max_rows,
+                compact_after=config.compact_after,
+                fsync=config.fsync
+            )
+        elif config.storage_backend == "segments":
+            # New readings go to an append-only segment log; data_path is its compacted base.
+            # A base CSV with an older column layout is rewritten once, at its first compaction.
+            return AppendOnlyStore(
+                os.path.splitext(self.data_path)[0] + "_segments",
+                self.base_columns,
+                base_path=self.data_path,
+                segment_max_rows=config.segment_max_rows,
+                compact_after=config.compact_after,
+                fsync=config.fsync
+            )
+        else:
+            raise ValueError(f"Unknown storage backend: {config.storage_backend}")
 
-        # Ensure CSV has correct columns
-        if os.path.exists(self.data_path):
+        # Import a pre-existing CSV once, into an empty store
+        if store.is_empty() and os.path.exists(self.data_path):
             df = pd.read_csv(self.data_path)
-            if "sensor" not in df.columns:
-                df["sensor"] = None
-            if "value" not in df.columns:
-                df["value"] = None
-            df.to_csv(self.data_path, index=False)
+            for col in self.base_columns:
+                if col not in df.columns:
+                    df[col] = None
+            store.append(df.to_dict("records"))
+        return store
 
     def load_data(self):
         """Load CSV safely with required columns."""
-        base_cols = ["patient_id", "timestamp", "sensor", "value"] + self.feature_columns
-        if os.path.exists(self.data_path):
-            try:
-                df = pd.read_csv(self.data_path)
-                for col in base_cols:
-                    if col not in df.columns:
-                        df[col] = None
-                return df
-            except Exception:
-                return pd.DataFrame(columns=base_cols)
-        return pd.DataFrame(columns=base_cols)
+        base_cols = self.base_columns
+        self.flush()
+        try:
+            return self._with_columns(self.store.read_all())
+        except Exception:
+            return pd.DataFrame(columns=base_cols)
+
+    def _with_columns(self, df):
+        for col in self.base_columns:
+            if col not in df.columns:
+                df[col] = None
+        return df
 
     def save_data(self, df):
-        """Save DataFrame to CSV."""
+        """Replace stored vitals with the given DataFrame."""
         os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
-        df.to_csv(self.data_path, index=False)
+        with self._write_lock:
+            with self._flush_lock:
+                with self._pending_lock:
+                    self._pending = []
+                self.store.replace(df)
+            self.index.clear()
+            self.index.warm(df, complete=True)
+            self.rollups.clear()
+            self.rollups.warm(df)
 
-    def store_vital_sign(self, vital):
-        """Store vitals in wide + long format (value column for graphing)."""
+    def _to_row(self, vital):
+        """Flatten a reading into wide + long format (value column for graphing)."""
         pid = getattr(vital, "patient_id", vital.get("patient_id"))
         timestamp = getattr(vital, "timestamp", vital.get("timestamp", datetime.now()))
         sensor_type = getattr(vital, "sensor_type", vital.get("sensor_type"))
         value = getattr(vital, "value", vital.get("value"))
-
-        df = self.load_data()
+        quality = getattr(vital, "quality_score", vital.get("quality_score"))
 
         mapping = {
             "ECG": "heart_rate",
@@ -56,27 +159,201 @@ class DataManager:
         }
         feature_col = mapping.get(sensor_type)
 
-        # Add or update row
-        new_row = {col: None for col in self.feature_columns}
-        new_row.update({
+        row = {col: None for col in self.feature_columns}
+        row.update({
             "patient_id": pid,
             "timestamp": timestamp,
             "sensor": sensor_type,
-            "value": value
+            "value": value,
+            "quality_score": quality
         })
         if feature_col:
-            new_row[feature_col] = value
+            row[feature_col] = value
+        return row
 
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        self.save_data(df)
+    def store_vital_sign(self, vital):
+        """Append one reading to the vitals log."""
+        self.store_vital_signs([vital])
+
+    def store_vital_signs(self, batch):
+        """Store a burst of readings with a single log append (or buffer them)."""
+        rows = [self._to_row(vital) for vital in batch]
+        if not rows:
+            return
+        with self._write_lock:
+            # The ring hands rows back to callers: keep them in the form reads return
+            self.index.add_many([self.store.as_stored(row) for row in rows])
+            self.rollups.add_many(rows)
+
+            if not self.group_commit:
+                self.store.append(rows)
+                return
+
+            with self._pending_lock:
+                self._pending.extend(rows)
+                full = len(self._pending) >= self.commit_max_rows
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write any buffered readings to the log."""
+        with self._flush_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return
+            try:
+                self.store.append(rows)
+            except Exception:
+                # Keep the readings for the next attempt rather than dropping them
+                with self._pending_lock:
+                    self._pending[:0] = rows
+                raise
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.commit_max_wait):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Group commit flush failed: {e}")
+
+    def _maintenance_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+                self.store.maintain()
+            except Exception as e:
+                print(f"⚠️ Vitals store maintenance failed: {e}")
+
+    def compact(self):
+        """Run the backend's compaction (segment folding / WAL checkpoint)."""
+        self.flush()
+        self.store.compact()
+
+    def close(self):
+        """Flush buffered readings and release the log."""
+        _open_managers.discard(self)
+        self._stop.set()
+        for worker in (self._flusher, self._maintainer):
+            if worker and worker is not threading.current_thread():
+                worker.join()
+        self.flush()
+        self.store.close()
+        self.archive.close()
+
+    def _catch_up(self, patient_id):
+        """Fold readings other writers (sessions, the ingest process) put in the shared store into the views."""
+        with self._write_lock:
+            rows = self.store.external_rows(patient_id)
+            if rows is None:
+                # Compacted or rewritten elsewhere: warm the views again
+                self.flush()
+                self.index.clear()
+                self.rollups.clear()
+                self._warm_views()
+            elif not rows.empty:
+                records = self._with_columns(rows).to_dict("records")
+                self.index.add_many(records)
+                self.rollups.add_many(records)
 
     def get_patient_vitals_history(self, patient_id, sensor_type=None, limit=30):
         """Get last N vitals."""
-        df = self.load_data()
-        patient_data = df[df["patient_id"] == patient_id]
-        if sensor_type:
-            patient_data = patient_data[patient_data["sensor"] == sensor_type]
-        return patient_data.tail(limit).to_dict("records")
+        self._catch_up(patient_id)
+        records = self.index.latest(patient_id, sensor_type, limit)
+        if records is not None:
+            return records
+        if limit <= self.index.depth and self.store.recent_covers(patient_id):
+            # No history older than the warm-up read: the rings already hold everything
+            self.index.mark_complete(patient_id)
+            return self.index.latest(patient_id, sensor_type, limit)
+
+        # Deeper than the in-memory rings: ask the backend
+        self.flush()
+        return self.store.read_patient(patient_id, sensor_type, limit).to_dict("records")
+
+    def get_vitals_range(self, patient_id, sensor_type=None, start=None, end=None):
+        """Get a patient's vitals with start <= timestamp <= end, oldest first."""
+        self.flush()
+        return self.store.read_range(patient_id, sensor_type, start, end).to_dict("records")
+
+    def get_rollup(self, patient_id, sensor_type, resolution="minute", start=None, end=None):
+        """Pre-aggregated count/min/mean/max buckets ("minute" or "hour") for one series."""
+        self._catch_up(patient_id)
+        if not self.rollups.covers(patient_id, sensor_type):
+            self._rebuild_rollup(patient_id, sensor_type)
+        return self.rollups.get(patient_id, sensor_type, resolution, start, end)
+
+    def _rebuild_rollup(self, patient_id, sensor_type):
+        """Rollups were warmed from part of the history: rebuild this series from the store, once."""
+        with self._write_lock:
+            if self.rollups.covers(patient_id, sensor_type):
+                return
+            if self.store.recent_covers(patient_id):
+                # The warm-up read already held all of this patient's readings
+                self.rollups.mark_complete(patient_id, sensor_type)
+                return
+            self.flush()
+            self.rollups.rebuild(patient_id, sensor_type, self.store.read_range(patient_id, sensor_type))
+
+    def seal_before(self, cutoff):
+        """Seal every reading up to ``cutoff`` into the columnar archive."""
+        self.flush()
+        return self.archive.seal(self.load_data(), timestamp_ns(cutoff))
+
+    def read_range(self, patient_id, sensor_type, start=None, end=None):
+        """Columnar scan of one series: {"timestamp" (epoch ns), "value", "quality"} arrays.
+
+        Sealed data is served from the memory-mapped archive (zero-copy when a
+        single segment covers the range); readings newer than the seal
+        watermark come from the ring index when it reaches back far enough,
+        else from the live store, and are appended.
+        """
+        start_ns = None if start is None else timestamp_ns(start)
+        end_ns = None if end is None else timestamp_ns(end)
+        sealed = self.archive.read_range(patient_id, sensor_type, start_ns, end_ns)
+
+        watermark = self.archive.sealed_until
+        if watermark is not None and end_ns is not None and end_ns <= watermark:
+            return sealed
+
+        tail_start_ns = start_ns
+        if watermark is not None and (start_ns is None or start_ns <= watermark):
+            tail_start_ns = watermark + 1
+        self._catch_up(patient_id)
+        tail_cols = self._tail_from_index(patient_id, sensor_type, tail_start_ns, end_ns)
+        if tail_cols is None:
+            tail_cols = self._tail_from_store(patient_id, sensor_type, tail_start_ns, end, watermark)
+        if not len(tail_cols["timestamp"]):
+            return sealed
+        return {col: np.concatenate([sealed[col], tail_cols[col]]) for col in tail_cols}
+
+    def _tail_from_index(self, patient_id, sensor_type, start_ns, end_ns):
+        """Unsealed readings from the in-memory ring, or None if it does not reach back to ``start_ns``."""
+        rows = self.index.series_since(patient_id, sensor_type, start_ns)
+        if rows is None:
+            return None
+        rows = sorted((pair for pair in rows if end_ns is None or pair[0] <= end_ns), key=lambda pair: pair[0])
+        return {
+            "timestamp": np.array([ts for ts, _ in rows], dtype=np.int64),
+            "value": pd.to_numeric(pd.Series([row.get("value") for _, row in rows], dtype=object),
+                                   errors="coerce").to_numpy(dtype=np.float64),
+            "quality": pd.to_numeric(pd.Series([row.get("quality_score") for _, row in rows], dtype=object),
+                                     errors="coerce").to_numpy(dtype=np.float32)
+        }
+
+    def _tail_from_store(self, patient_id, sensor_type, start_ns, end, watermark):
+        self.flush()
+        tail = self.store.read_range(patient_id, sensor_type, None if start_ns is None else pd.Timestamp(start_ns), end)
+        tail_ts = pd.to_datetime(tail["timestamp"], errors="coerce")
+        tail = tail[tail_ts.notna()]
+        tail_ns = tail_ts[tail_ts.notna()].astype("int64")
+        if watermark is not None:
+            tail, tail_ns = tail[tail_ns > watermark], tail_ns[tail_ns > watermark]
+        return {
+            "timestamp": tail_ns.to_numpy(dtype=np.int64),
+            "value": pd.to_numeric(tail["value"], errors="coerce").to_numpy(dtype=np.float64),
+            "quality": pd.to_numeric(tail["quality_score"], errors="coerce").to_numpy(dtype=np.float32)
+        }
 
     def store_prediction(self, prediction):
         pass
@@ -0,0 +1,218 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .ProductionVitalsPredictor import ProductionVitalsPredictor
+
+_worker_predictor = None
+
+
+def _init_worker(config):
+    """Process pool initializer: load the model once per worker."""
+    global _worker_predictor
+    _worker_predictor = ProductionVitalsPredictor(config)
+    _worker_predictor.model
+
+
+def _score(features):
+    predictor = _worker_predictor
+    return np.asarray(predictor.predict(pd.DataFrame(features, columns=predictor.required_features)), dtype=np.float64)
+
+
+class InferenceService:
+    """Micro-batching front end for ProductionVitalsPredictor.
+
+    Callers submit single feature rows and get a Future back. A dispatcher
+    thread waits for the first request, then keeps collecting until
+    ``max_batch`` rows are queued or ``max_wait_ms`` has passed, and scores
+    the batch in one model call on a process pool whose workers preload the
+    model. Up to two batches per worker are in flight, so throughput scales
+    with ``workers``. With ``latency_budget_ms`` set, the wait shrinks while
+    the recent p99 is over budget and grows back when there is headroom.
+    ``workers=0`` scores in the dispatcher thread instead of a pool.
+    """
+
+    def __init__(self, config, max_batch=None, max_wait_ms=None, workers=None, latency_budget_ms=None,
+                 max_queued=10000):
+        # Arguments left as None fall back to the config's inference_* settings
+        self.predictor = ProductionVitalsPredictor(config)
+        self.max_batch = max_batch or config.inference_max_batch
+        self.max_wait = (config.inference_max_wait_ms if max_wait_ms is None else max_wait_ms) / 1000.0
+        latency_budget_ms = latency_budget_ms or config.inference_latency_budget_ms
+        self.latency_budget = latency_budget_ms / 1000.0 if latency_budget_ms else None
+        workers = config.inference_workers if workers is None else workers
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._wait = self.max_wait
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._latencies = deque(maxlen=2000)
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "errors": 0}
+
+        if self.workers > 0:
+            # spawn: forking a process that already runs threads is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(config,))
+            self._in_flight = threading.BoundedSemaphore(2 * self.workers)
+            # Start every worker (and load its model) now rather than on the first request
+            warm = np.zeros((1, len(self.predictor.required_features)))
+            for future in [self._pool.submit(_score, warm) for _ in range(self.workers)]:
+                future.result()
+        else:
+            self._pool = None
+            self.predictor.model
+
+        self._running = True
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="inference-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    # ---------- requests ----------
+
+    def submit(self, features):
+        """Queue one feature row (list in ``required_features`` order, or dict); returns a Future of the value."""
+        if not self._running:
+            raise RuntimeError("InferenceService is closed")
+        if isinstance(features, dict):
+            row = [features.get(name, 0) for name in self.predictor.required_features]
+        else:
+            row = list(features)
+        future = Future()
+        self._queue.put((row, future, time.perf_counter()))
+        return future
+
+    def submit_trend(self, patient_id, history):
+        """Future of the predict_trend result dict for one patient (None for empty history)."""
+        result = Future()
+        if not history:
+            result.set_result(None)
+            return result
+
+        def done(future):
+            if future.cancelled():
+                result.cancel()
+            elif future.exception() is not None:
+                result.set_exception(future.exception())
+            else:
+                result.set_result(self.predictor._trend_result(future.result()))
+        self.submit(self.predictor.feature_extractor.vector(history)).add_done_callback(done)
+        return result
+
+    async def predict_async(self, features):
+        return await asyncio.wrap_future(self.submit(features))
+
+    # ---------- dispatch ----------
+
+    def _dispatch_loop(self):
+        while self._running or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            deadline = time.perf_counter() + self._wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # Never let one bad batch stop the dispatcher
+                print(f"⚠️ Inference batch failed: {e}")
+                self._finish(batch, error=e)
+
+    def _run_batch(self, batch):
+        # Drop requests cancelled while queued; the rest can no longer be cancelled
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        features = np.array([row for row, _, _ in batch], dtype=np.float64)
+        if self._pool is None:
+            try:
+                values = np.asarray(self.predictor.predict(
+                    pd.DataFrame(features, columns=self.predictor.required_features)), dtype=np.float64)
+            except Exception as e:
+                self._finish(batch, error=e)
+            else:
+                self._finish(batch, values=values)
+            return
+
+        self._in_flight.acquire()
+        try:
+            pending = self._pool.submit(_score, features)
+        except Exception as e:
+            self._in_flight.release()
+            self._finish(batch, error=e)
+            return
+
+        def done(future):
+            self._in_flight.release()
+            if future.exception() is not None:
+                self._finish(batch, error=future.exception())
+            else:
+                self._finish(batch, values=future.result())
+        pending.add_done_callback(done)
+
+    def _finish(self, batch, values=None, error=None):
+        now = time.perf_counter()
+        for i, (_, future, submitted) in enumerate(batch):
+            if future.done():
+                continue
+            try:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(float(values[i]))
+            except InvalidStateError:
+                pass   # resolved concurrently (e.g. cancelled)
+        with self._stats_lock:
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            if error is not None:
+                self.stats["errors"] += len(batch)
+            self._latencies.extend(now - submitted for _, _, submitted in batch)
+            if self.latency_budget and self.stats["batches"] % 16 == 0:
+                self._adapt_wait()
+
+    def _adapt_wait(self):
+        p99 = float(np.percentile(self._latencies, 99))
+        if p99 > self.latency_budget:
+            self._wait = self._wait / 2
+        elif p99 < 0.5 * self.latency_budget:
+            self._wait = min(self.max_wait, max(self._wait * 2, 0.0005))
+
+    # ---------- lifecycle ----------
+
+    def get_statistics(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+            latencies = np.asarray(self._latencies) * 1000.0
+        stats["mean_batch"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["queued"] = self._queue.qsize()
+        stats["current_wait_ms"] = self._wait * 1000.0
+        if len(latencies):
+            stats["p50_ms"], stats["p99_ms"] = (float(v) for v in np.percentile(latencies, [50, 99]))
+        return stats
+
+    def close(self):
+        """Finish queued requests, then stop the dispatcher and the pool."""
+        if not self._running:
+            return
+        self._running = False
+        self._dispatcher.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
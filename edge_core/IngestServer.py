@@ -0,0 +1,199 @@
+import ipaddress
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Listener
+
+
+class IngestServer:
+    """Single-writer ingest daemon that owns the vitals store.
+
+    Any number of producers (Streamlit sessions, replicas, gateways) connect
+    with RemoteDataManager and send batches of readings. Connection threads
+    only enqueue; one writer thread drains the queue and hands everything
+    that has accumulated to ``DataManager.store_vital_signs`` in a single
+    call, so the store sees one writer and a few large appends however many
+    producers there are. Reads are answered from the owning DataManager.
+
+    Connections unpickle what they receive, so the auth key is the only
+    thing between a peer and code execution: the built-in default key is
+    only accepted for Unix sockets and loopback addresses.
+    """
+
+    DEFAULT_AUTHKEY = b"edge-core-ingest"
+
+    # Read operations clients may call, mapped to DataManager methods
+    READ_OPS = {
+        "load_data": "load_data",
+        "history": "get_patient_vitals_history",
+        "range": "get_vitals_range",
+        "read_range": "read_range",
+        "rollup": "get_rollup",
+        "seal_before": "seal_before",
+        "compact": "compact"
+    }
+
+    def __init__(self, data_manager, address, authkey, max_queued_batches=10000):
+        self.data_manager = data_manager
+        self.address = self.parse_address(address)
+        self.authkey = self.resolve_authkey(self.address, authkey)
+        self._queue = queue.Queue(maxsize=max_queued_batches)
+        self._listener = None
+        self._threads = []
+        self._running = threading.Event()
+        self.stats = {"connections": 0, "rows_received": 0, "rows_written": 0, "writes": 0}
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def parse_address(address):
+        """"host:port" -> TCP tuple; anything else is a Unix socket path."""
+        if isinstance(address, tuple):
+            return address
+        host, sep, port = address.rpartition(":")
+        if sep and port.isdigit() and os.sep not in address:
+            return (host or "127.0.0.1", int(port))
+        return address
+
+    @classmethod
+    def resolve_authkey(cls, address, authkey):
+        """Auth key bytes for ``address``; without one, only local addresses get the default key."""
+        if authkey:
+            return authkey.encode("utf-8") if isinstance(authkey, str) else authkey
+        if isinstance(address, tuple) and not cls._is_loopback(address[0]):
+            raise ValueError(f"ingest_authkey must be set to serve or connect over TCP on {address[0]}:{address[1]}")
+        return cls.DEFAULT_AUTHKEY
+
+    @staticmethod
+    def _is_loopback(host):
+        if host == "localhost":
+            return True
+        try:
+            return ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            return False
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if isinstance(self.address, str):
+            os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # stale socket from a previous run
+        self._listener = Listener(self.address, backlog=128, authkey=self.authkey)
+        self._running.set()
+        for target, name in ((self._write_loop, "ingest-writer"), (self._accept_loop, "ingest-accept")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop accepting, write whatever is queued and flush the store."""
+        self._running.clear()
+        if self._listener is not None:
+            self._listener.close()
+        self._queue.put(None)
+        for thread in self._threads:
+            if thread.name == "ingest-writer":
+                thread.join()
+        self.data_manager.flush()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while self._running.is_set():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    # ---------- connections ----------
+
+    def _accept_loop(self):
+        while self._running.is_set():
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                if not self._running.is_set():
+                    return
+                # A failed handshake only loses that one client
+                print(f"⚠️ Ingest connection rejected: {e}")
+                continue
+            with self._stats_lock:
+                self.stats["connections"] += 1
+            threading.Thread(target=self._serve, args=(conn,), name="ingest-conn", daemon=True).start()
+
+    def _barrier(self):
+        """Wait until everything queued so far has been written and flushed."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def _serve(self, conn):
+        dirty = False
+        with conn:
+            while True:
+                try:
+                    op, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                if op == "store":
+                    # Fire-and-forget: producers never wait on disk
+                    self._queue.put(args)
+                    with self._stats_lock:
+                        self.stats["rows_received"] += len(args)
+                    dirty = True
+                    continue
+
+                # Reads and flushes see this connection's earlier writes
+                if dirty:
+                    self._barrier()
+                    dirty = False
+                try:
+                    if op == "flush":
+                        result = None
+                    elif op == "stats":
+                        result = dict(self.stats)
+                    else:
+                        result = getattr(self.data_manager, self.READ_OPS[op])(*args)
+                    conn.send(("ok", result))
+                except Exception as e:
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    # ---------- single writer ----------
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch, barriers = [], []
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    barriers.append(item)
+                else:
+                    batch.extend(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self.data_manager.store_vital_signs(batch)
+                    with self._stats_lock:
+                        self.stats["rows_written"] += len(batch)
+                        self.stats["writes"] += 1
+                except Exception as e:
+                    print(f"⚠️ Ingest write failed: {e}")
+            if barriers:
+                try:
+                    self.data_manager.flush()
+                except Exception as e:
+                    print(f"⚠️ Ingest flush failed: {e}")
+                for done in barriers:
+                    done.set()
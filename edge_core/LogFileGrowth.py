@@ -0,0 +1,93 @@
+import io
+import os
+
+import pandas as pd
+
+
+class LogFileGrowth:
+    """How many bytes of each CSV log file are already reflected in memory.
+
+    Lets an append-only store pick out the rows another process (another
+    DataManager on the same files) appended since it last looked. One
+    instance is shared by every partition of a PartitionedStore.
+    """
+
+    def __init__(self):
+        self.enabled = False   # nothing is collected until a baseline has been taken
+        self.sizes = {}        # path -> bytes already seen
+        self.found = []        # (path, rows) others appended, noticed just before one of our writes
+
+    @staticmethod
+    def _in(path, directory, base_path):
+        return path == base_path or os.path.dirname(path) == directory
+
+    def rebase(self, paths):
+        """Treat the current contents of ``paths`` as seen."""
+        self.enabled = True
+        for path in paths:
+            if os.path.exists(path):
+                self.sizes[path] = os.path.getsize(path)
+
+    def forget(self, directory=None, base_path=None, keep_found=False):
+        """Drop what is known about one store's files (every file if no directory is given)."""
+        if directory is None:
+            self.sizes, self.found = {}, []
+            return
+        self.sizes = {p: size for p, size in self.sizes.items() if not self._in(p, directory, base_path)}
+        if not keep_found:
+            self.found = [(p, rows) for p, rows in self.found if not self._in(p, directory, base_path)]
+
+    def wrote(self, path, size):
+        """Record our own append: ``path`` is now ``size`` bytes."""
+        self.sizes[path] = size
+
+    def catch_up(self, path):
+        """Set aside rows others appended to ``path`` (before we append to or compact it)."""
+        if not self.enabled or not os.path.exists(path):
+            return
+        if os.path.getsize(path) > self.sizes.get(path, 0):
+            rows = self._read_new(path)
+            if rows is not None:
+                self.found.append((path, rows))
+
+    def _read_new(self, path):
+        seen = self.sizes.get(path, 0)
+        with open(path, "rb") as f:
+            header = f.readline()
+            if not header.endswith(b"\n"):
+                return None
+            start = max(seen, len(header))
+            f.seek(start)
+            data = f.read()
+        # A row still being written is left for the next look
+        data = data[:data.rfind(b"\n") + 1]
+        self.sizes[path] = start + len(data)
+        if not data:
+            return None
+        return pd.read_csv(io.BytesIO(header + data))
+
+    def scan(self, directory, base_path, segments):
+        """Frames of rows others appended to one store's files since the last look.
+
+        Returns None, after taking a new baseline, when the files were
+        compacted or rewritten elsewhere rather than appended to.
+        """
+        if not self.enabled:
+            return []
+        tracked = [p for p in self.sizes if self._in(p, directory, base_path)]
+        base_size = os.path.getsize(base_path) if os.path.exists(base_path) else None
+        try:
+            if base_size != self.sizes.get(base_path) or not all(os.path.exists(p) for p in tracked):
+                raise FileNotFoundError(base_path)
+            frames = [rows for p, rows in self.found if self._in(p, directory, base_path)]
+            self.found = [(p, rows) for p, rows in self.found if not self._in(p, directory, base_path)]
+            for path in segments:
+                if os.path.getsize(path) > self.sizes.get(path, 0):
+                    rows = self._read_new(path)
+                    if rows is not None:
+                        frames.append(rows)
+            return frames
+        except FileNotFoundError:
+            self.forget(directory, base_path)
+            self.rebase([base_path] + [p for p in segments if os.path.exists(p)])
+            return None
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+from .CompiledModel import CompiledModel
+
+
+class ModelRegistry:
+    """Process-wide, lazily loaded and hot-reloadable model cache.
+
+    ``ModelRegistry.shared(path, ...)`` returns the one registry for a model
+    file and set of options, so every predictor (and every Streamlit session) in the process shares a
+    single loaded model. Nothing is read until the first ``get()``. After
+    that the files are re-checked at most every ``check_interval`` seconds:
+    when the mtime or size of the pickle or of its compiled ``.npz`` export
+    changes, the source is chosen again and, if the content hash differs,
+    the new model is loaded off to the side and swapped in with one
+    assignment, so readers see either the old (model, version) pair or the
+    new one. The compiled artifact is served only while its recorded
+    ``source_sha256`` matches the pickle; a retrained pickle is picked up
+    (unpickled) until it is exported again. The version is the pickle's
+    hash, so both forms of the same model share cached predictions.
+    """
+
+    _registries = {}
+    _registries_lock = threading.Lock()
+
+    def __init__(self, path, compiled_path=None, check_interval=2.0):
+        self.path = path
+        self.compiled_path = compiled_path
+        self.check_interval = check_interval
+        self._loaded = None          # (model, version) swapped atomically
+        self._stat = None            # (mtime_ns, size) of the pickle and the compiled file
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.source = None           # file the current model was loaded from
+        self.reloads = 0
+
+    @classmethod
+    def shared(cls, path, compiled_path=None, check_interval=2.0):
+        path = os.path.abspath(path)
+        compiled_path = compiled_path and os.path.abspath(compiled_path)
+        key = (path, compiled_path, check_interval)
+        with cls._registries_lock:
+            registry = cls._registries.get(key)
+            if registry is None:
+                registry = cls._registries[key] = cls(path, compiled_path, check_interval)
+            return registry
+
+    def get(self):
+        """Current (model, version); model is None when no model file exists."""
+        loaded = self._loaded
+        if loaded is None or time.monotonic() - self._checked_at >= self.check_interval:
+            loaded = self._refresh()
+        return loaded
+
+    def model(self):
+        return self.get()[0]
+
+    def version(self):
+        return self.get()[1]
+
+    @staticmethod
+    def _file_stat(path):
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._loaded is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._loaded
+            self._checked_at = time.monotonic()
+            stat = (self._file_stat(self.path), self._file_stat(self.compiled_path))
+            if stat == (None, None):
+                if self._loaded is None:
+                    print(f"⚠️ Model file missing at {self.path}, using dummy model")
+                    self._loaded = (None, None)
+                return self._loaded
+            if self._loaded is not None and stat == self._stat:
+                return self._loaded
+            try:
+                model, version, source = self._load(stat)
+                if self._loaded is None or version != self._loaded[1] or source != self.source:
+                    if self._loaded is not None and version != self._loaded[1]:
+                        self.reloads += 1
+                    self._loaded = (model, version)
+                    self.source = source
+                self._stat = stat
+            except Exception as e:
+                # Half-written or incompatible file: keep serving the previous model
+                print(f"⚠️ Could not load model from {self.path}: {e}")
+                if self._loaded is None:
+                    self._loaded = (None, None)
+            return self._loaded
+
+    def _load(self, stat):
+        """(model, version, source path), preferring a compiled export of the current pickle."""
+        pickled = None
+        if stat[0] is not None:
+            with open(self.path, "rb") as f:
+                pickled = f.read()
+        digest = hashlib.sha256(pickled).hexdigest() if pickled is not None else None
+
+        if stat[1] is not None:
+            with open(self.compiled_path, "rb") as f:
+                data = f.read()
+            if digest is None:
+                return CompiledModel.from_bytes(data), hashlib.sha256(data).hexdigest()[:16], self.compiled_path
+            compiled = CompiledModel.from_bytes(data)
+            if compiled.meta.get("source_sha256") == digest:
+                return compiled, digest[:16], self.compiled_path
+            print(f"⚠️ Compiled model at {self.compiled_path} is stale, using {self.path}")
+
+        if self._loaded is not None and self.source == self.path and digest[:16] == self._loaded[1]:
+            return self._loaded[0], self._loaded[1], self.path
+        return pickle.loads(pickled), digest[:16], self.path
@@ -0,0 +1,310 @@
+import heapq
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict, deque
+from datetime import datetime
+
+PRIORITIES = ("low", "normal", "high")
+
+
+class StdoutSink:
+    name = "stdout"
+
+    def __init__(self, max_batch=None):
+        self.max_batch = max_batch
+
+    def send(self, batch):
+        for note in batch:
+            print(f"{note['title']} [{note['patient_id']}] {' | '.join(note['messages'])}")
+
+
+class FileSink:
+    """Appends notifications as JSON lines."""
+
+    def __init__(self, path, max_batch=None):
+        self.path = path
+        self.name = f"file:{path}"
+        self.max_batch = max_batch
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def send(self, batch):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(note) + "\n" for note in batch))
+
+
+class WebhookSink:
+    """POSTs each batch as a JSON list (e.g. to the nurse-station gateway)."""
+
+    def __init__(self, url, timeout=5.0, max_batch=None):
+        self.url = url
+        self.name = url
+        self.timeout = timeout
+        self.max_batch = max_batch
+
+    def send(self, batch):
+        request = urllib.request.Request(self.url, data=json.dumps(batch).encode("utf-8"), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 300:
+                raise IOError(f"webhook returned HTTP {response.status}")
+
+
+class _PriorityQueue:
+    """Bounded FIFO per priority level; when full, the oldest lowest-priority item is shed."""
+
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self.levels = [deque() for _ in PRIORITIES]
+        self.size = 0
+
+    def push(self, item, priority):
+        """Queue ``item``; returns the item shed to make room (possibly ``item`` itself), or None."""
+        if self.size >= self.max_items:
+            lowest = next(p for p, level in enumerate(self.levels) if level)
+            if lowest > priority:
+                return item
+            self.levels[priority].append(item)
+            return self.levels[lowest].popleft()
+        self.levels[priority].append(item)
+        self.size += 1
+        return None
+
+    def pop_batch(self, n):
+        """Up to ``n`` items, highest priority first."""
+        batch = []
+        for level in reversed(self.levels):
+            while level and len(batch) < n:
+                batch.append(level.popleft())
+        self.size -= len(batch)
+        return batch
+
+
+class _SinkWorker:
+    """Delivery thread for one sink: batches its queue and retries with exponential backoff."""
+
+    def __init__(self, dispatcher, sink):
+        self.dispatcher = dispatcher
+        self.sink = sink
+        self.queue = _PriorityQueue(dispatcher.max_queued)
+        self.stats = {"delivered": 0, "batches": 0, "retries": 0, "failed": 0, "shed": 0}
+        self.sending = 0
+        self.thread = threading.Thread(target=self._run, name=f"notify-{sink.name}", daemon=True)
+
+    def _run(self):
+        d = self.dispatcher
+        while True:
+            with d._cond:
+                while not self.queue.size and d._running:
+                    d._cond.wait()
+                if not self.queue.size:
+                    return
+                batch = self.queue.pop_batch(getattr(self.sink, "max_batch", None) or d.max_batch)
+                self.sending = len(batch)
+            self._deliver(batch)
+            with d._cond:
+                self.sending = 0
+                d._cond.notify_all()
+
+    def _deliver(self, batch):
+        d = self.dispatcher
+        delay = d.retry_backoff
+        for attempt in range(d.max_retries + 1):
+            try:
+                self.sink.send(batch)
+            except Exception as e:
+                with d._cond:
+                    if attempt == d.max_retries or not d._running:
+                        print(f"⚠️ Dropping {len(batch)} notifications for {self.sink.name}: {e}")
+                        self.stats["failed"] += len(batch)
+                        return
+                    self.stats["retries"] += 1
+                    # Back off, but stop waiting if the dispatcher shuts down
+                    d._cond.wait_for(lambda: not d._running, timeout=delay)
+                delay = min(delay * 2, d.max_backoff)
+            else:
+                with d._cond:
+                    self.stats["delivered"] += len(batch)
+                    self.stats["batches"] += 1
+                return
+
+
+class NotificationDispatcher:
+    """Delivers alerts to sinks off the ingest path, coalescing per patient.
+
+    ``notify`` only touches in-memory structures under a lock and never
+    blocks on delivery. The first alert for a patient opens a coalescing
+    window of ``coalesce_s`` seconds; alerts arriving inside it are merged
+    into one notification (unique messages, highest priority, a count),
+    which is handed to every sink when the window closes. Each sink has its
+    own thread that sends batches of up to ``max_batch`` notifications (or
+    the sink's own ``max_batch``, if it sets one), so a slow webhook never
+    holds up the file or stdout sinks, and failed batches are retried with
+    exponential backoff. Open windows and sink
+    queues are bounded; when full, the oldest notification of the lowest
+    priority is shed first.
+    """
+
+    def __init__(self, sinks, coalesce_s=5.0, max_pending=1000, max_queued=1000, max_batch=50,
+                 max_retries=5, retry_backoff=0.5, max_backoff=30.0, max_messages=10):
+        self.coalesce_s = coalesce_s
+        self.max_pending = max_pending
+        self.max_queued = max_queued
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.max_messages = max_messages
+
+        self._cond = threading.Condition()
+        self._pending = {}                                      # patient_id -> open notification
+        self._pending_levels = [OrderedDict() for _ in PRIORITIES]  # priority -> {patient_id: None}
+        self._deadlines = []                                    # heap of (deadline, seq, patient_id)
+        self._seq = 0
+        self._running = True
+        self.stats = {"submitted": 0, "coalesced": 0, "shed": 0, "notifications": 0}
+
+        self.workers = [_SinkWorker(self, self.sink_from_spec(sink, max_batch)) for sink in sinks]
+        for worker in self.workers:
+            worker.thread.start()
+        self._coalescer = threading.Thread(target=self._coalesce_loop, name="notify-coalescer", daemon=True)
+        self._coalescer.start()
+
+    @classmethod
+    def from_config(cls, config):
+        """Dispatcher for ``config.notification_sinks``, or None when none are configured."""
+        specs = getattr(config, "notification_sinks", None)
+        if not specs:
+            return None
+        return cls(specs, coalesce_s=config.notify_coalesce_s,
+                   max_pending=config.notify_max_pending, max_queued=config.notify_max_queued,
+                   max_batch=config.notify_max_batch, max_retries=config.notify_max_retries)
+
+    @staticmethod
+    def sink_from_spec(spec, max_batch=None):
+        """Sink for "stdout", "file:<path>" or an "http(s)://..." webhook; sink objects pass through."""
+        if not isinstance(spec, str):
+            return spec
+        if spec == "stdout":
+            return StdoutSink(max_batch=max_batch)
+        if spec.startswith("file:"):
+            return FileSink(spec[len("file:"):], max_batch=max_batch)
+        if spec.startswith(("http://", "https://")):
+            return WebhookSink(spec, max_batch=max_batch)
+        raise ValueError(f"Unknown notification sink '{spec}'")
+
+    # ---------- ingest side ----------
+
+    def notify(self, patient_id, title, messages, priority="normal"):
+        """Queue an alert (one message or a list) for delivery; returns immediately."""
+        level = PRIORITIES.index(priority)
+        messages = [messages] if isinstance(messages, str) else list(messages)
+        now = time.monotonic()
+        with self._cond:
+            if not self._running:
+                return
+            self.stats["submitted"] += 1
+            note = self._pending.get(patient_id)
+            if note is not None:
+                self.stats["coalesced"] += 1
+                note["count"] += 1
+                for message in messages:
+                    if message not in note["messages"]:
+                        note["messages"].append(message)
+                del note["messages"][:-self.max_messages]
+                if level > note["_level"]:
+                    del self._pending_levels[note["_level"]][patient_id]
+                    self._pending_levels[level][patient_id] = None
+                    note["_level"], note["priority"] = level, priority
+                return
+
+            if len(self._pending) >= self.max_pending:
+                # Full: make room only for a higher priority; same-level windows already coalesce
+                lowest = next(p for p, pids in enumerate(self._pending_levels) if pids)
+                if lowest >= level:
+                    self.stats["shed"] += 1
+                    return
+                shed, _ = self._pending_levels[lowest].popitem(last=False)
+                del self._pending[shed]
+                self.stats["shed"] += 1
+
+            self._seq += 1
+            self._pending[patient_id] = {
+                "patient_id": patient_id, "title": title, "messages": messages[-self.max_messages:], "priority": priority,
+                "count": 1, "first_alert": datetime.now().isoformat(timespec="seconds"), "_level": level,
+                "_seq": self._seq
+            }
+            self._pending_levels[level][patient_id] = None
+            heapq.heappush(self._deadlines, (now + self.coalesce_s, self._seq, patient_id))
+            if len(self._deadlines) == 1:
+                self._cond.notify_all()
+
+    # ---------- delivery side ----------
+
+    def _coalesce_loop(self):
+        with self._cond:
+            while self._running or self._pending:
+                if not self._deadlines:
+                    self._cond.wait()
+                    continue
+                wait = self._deadlines[0][0] - time.monotonic()
+                if wait > 0 and self._running:
+                    self._cond.wait(wait)
+                    continue
+                _, seq, patient_id = heapq.heappop(self._deadlines)
+                note = self._pending.get(patient_id)
+                if note is None or note["_seq"] != seq:
+                    continue   # window shed (the patient may have opened a newer one)
+                del self._pending[patient_id]
+                del note["_seq"]
+                level = note.pop("_level")
+                del self._pending_levels[level][patient_id]
+                note["sent_at"] = datetime.now().isoformat(timespec="seconds")
+                self.stats["notifications"] += 1
+                for worker in self.workers:
+                    if worker.queue.push(note, level) is not None:
+                        worker.stats["shed"] += 1
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Close all open windows now and wait until the sink queues drain."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._deadlines = [(0.0, seq, pid) for _, seq, pid in self._deadlines]
+            heapq.heapify(self._deadlines)
+            self._cond.notify_all()
+            while self._pending or any(worker.queue.size or worker.sending for worker in self.workers):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(0.05 if remaining is None else min(remaining, 0.05))
+        return True
+
+    def get_statistics(self):
+        with self._cond:
+            stats = dict(self.stats, pending=len(self._pending))
+            stats["sinks"] = {worker.sink.name: dict(worker.stats, queued=worker.queue.size)
+                              for worker in self.workers}
+        return stats
+
+    def close(self, timeout=10.0):
+        """Deliver what is queued (up to ``timeout``), then stop the threads."""
+        if not self._running:
+            return
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._coalescer.join(timeout)
+        for worker in self.workers:
+            worker.thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,159 @@
+import math
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from .VitalsFeatureExtractor import VitalsFeatureExtractor
+from .VitalsStore import timestamp_ns
+
+
+class _PatientState:
+    """Per-feature running statistics for one patient (plain lists, indexed by feature)."""
+
+    __slots__ = ("last", "last_ns", "ewma", "ring", "pos", "count", "total", "total_sq")
+
+    def __init__(self, n_features, window):
+        self.last = [None] * n_features
+        self.last_ns = [None] * n_features
+        self.ewma = [None] * n_features
+        self.ring = [[0.0] * window for _ in range(n_features)]
+        self.pos = [0] * n_features
+        self.count = [0] * n_features
+        self.total = [0.0] * n_features
+        self.total_sq = [0.0] * n_features
+
+
+class OnlineVitalsFeatures:
+    """Incremental per-patient feature state for the predictor.
+
+    Each reading updates its patient's last value, EWMA, rolling mean/std
+    over the last ``window`` values and last-seen time in O(1), so
+    predictions read features directly instead of re-deriving them from a
+    freshly loaded history. Rolling sums are recomputed from the ring once
+    per wrap to keep float drift bounded (amortised O(1)).
+    """
+
+    FEATURES = VitalsFeatureExtractor.FEATURES
+    DEFAULTS = VitalsFeatureExtractor.DEFAULTS
+    STATS = ["last", "ewma", "mean", "std", "age_s"]
+
+    def __init__(self, window=30, alpha=0.3):
+        self.window = window
+        self.alpha = alpha
+        self.n_features = len(self.FEATURES)
+        self._patients = {}
+        self._lock = threading.Lock()
+
+    # ---------- updates ----------
+
+    def update(self, reading):
+        self.update_many([reading])
+
+    def update_many(self, readings):
+        with self._lock:
+            for reading in readings:
+                reading = reading if isinstance(reading, dict) else vars(reading)
+                pairs = VitalsFeatureExtractor.feature_values(reading)
+                if not pairs:
+                    continue
+                ts = reading.get("timestamp")
+                ts_ns = timestamp_ns(ts if ts is not None else datetime.now())
+                state = self._patients.get(reading["patient_id"])
+                if state is None:
+                    state = self._patients[reading["patient_id"]] = _PatientState(self.n_features, self.window)
+                for idx, value in pairs:
+                    self._push(state, idx, value, ts_ns)
+
+    def _push(self, state, idx, value, ts_ns):
+        state.last[idx] = value
+        state.last_ns[idx] = ts_ns
+        ewma = state.ewma[idx]
+        state.ewma[idx] = value if ewma is None else ewma + self.alpha * (value - ewma)
+
+        ring, pos = state.ring[idx], state.pos[idx]
+        if state.count[idx] == self.window:
+            old = ring[pos]
+            state.total[idx] -= old
+            state.total_sq[idx] -= old * old
+        else:
+            state.count[idx] += 1
+        ring[pos] = value
+        state.total[idx] += value
+        state.total_sq[idx] += value * value
+        pos = (pos + 1) % self.window
+        state.pos[idx] = pos
+        if pos == 0:
+            state.total[idx] = math.fsum(ring)
+            state.total_sq[idx] = math.fsum(v * v for v in ring)
+
+    def drop(self, patient_id):
+        with self._lock:
+            self._patients.pop(patient_id, None)
+
+    # ---------- reads ----------
+
+    def patients(self):
+        with self._lock:
+            return list(self._patients)
+
+    def __contains__(self, patient_id):
+        return patient_id in self._patients
+
+    def latest(self, patient_id):
+        """Latest value per feature (defaults where never seen), in ``FEATURES`` order."""
+        state = self._patients.get(patient_id)
+        if state is None:
+            return list(self.DEFAULTS)
+        return [default if last is None else last for last, default in zip(state.last, self.DEFAULTS)]
+
+    def matrix(self, patient_ids):
+        """(n_patients, n_features) array of latest values."""
+        with self._lock:
+            rows = [self.latest(pid) for pid in patient_ids]
+        return np.array(rows, dtype=np.float64).reshape(-1, self.n_features)
+
+    def snapshot(self, patient_id, now=None):
+        """{feature: {last, ewma, mean, std, count, age_s}} for features seen so far, or None."""
+        now_ns = timestamp_ns(now if now is not None else datetime.now())
+        with self._lock:
+            state = self._patients.get(patient_id)
+            if state is None:
+                return None
+            snapshot = {}
+            for idx, name in enumerate(self.FEATURES):
+                if state.last[idx] is None:
+                    continue
+                mean, std = self._mean_std(state, idx)
+                snapshot[name] = {
+                    "last": state.last[idx],
+                    "ewma": state.ewma[idx],
+                    "mean": mean,
+                    "std": std,
+                    "count": state.count[idx],
+                    "age_s": (now_ns - state.last_ns[idx]) / 1e9
+                }
+            return snapshot
+
+    def stats_matrix(self, patient_ids, now=None):
+        """(n_patients, n_features, len(STATS)) array; NaN where a feature was never seen."""
+        now_ns = timestamp_ns(now if now is not None else datetime.now())
+        out = np.full((len(patient_ids), self.n_features, len(self.STATS)), np.nan)
+        with self._lock:
+            for row, pid in enumerate(patient_ids):
+                state = self._patients.get(pid)
+                if state is None:
+                    continue
+                for idx in range(self.n_features):
+                    if state.last[idx] is None:
+                        continue
+                    mean, std = self._mean_std(state, idx)
+                    out[row, idx] = (state.last[idx], state.ewma[idx], mean, std,
+                                     (now_ns - state.last_ns[idx]) / 1e9)
+        return out
+
+    @staticmethod
+    def _mean_std(state, idx):
+        n = state.count[idx]
+        mean = state.total[idx] / n
+        return mean, math.sqrt(max(state.total_sq[idx] / n - mean * mean, 0.0))
@@ -0,0 +1,293 @@
+import os
+import shutil
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+
+from .AppendOnlyStore import AppendOnlyStore
+from .LogFileGrowth import LogFileGrowth
+from .VitalsStore import VitalsStore
+
+
+class PartitionedStore(VitalsStore):
+    """Vitals split into time partitions per patient group.
+
+    Layout is ``<root>/g<group>/<period start>/``, and every partition is an
+    AppendOnlyStore of its own. Patients are hashed into ``patient_groups``
+    groups, so a patient lookup only touches its group's partitions, and
+    expiring a period is a directory delete or rename, whatever its size.
+    Schema changes are applied lazily per partition by AppendOnlyStore the
+    first time that partition is written or compacted.
+    """
+
+    NAME_FORMAT = "%Y%m%dT%H"
+
+    def __init__(self, root, columns, partition_hours=24, patient_groups=16, retention_days=None,
+                 archive_expired=False, warm_partitions=2, max_open_partitions=64,
+                 segment_max_rows=10000, compact_after=8, fsync=False):
+        self.root = root
+        self.columns = list(columns)
+        self.period_ns = int(partition_hours * 3600 * 1e9)
+        self.patient_groups = patient_groups
+        self.retention_days = retention_days
+        self.archive_expired = archive_expired
+        self.warm_partitions = warm_partitions
+        self.max_open_partitions = max_open_partitions
+        self.store_options = {
+            "segment_max_rows": segment_max_rows,
+            "compact_after": compact_after,
+            "fsync": fsync
+        }
+        self.recent_is_complete = False
+        self._warm_from = None   # oldest period read by read_recent ("" if there was none)
+        self._members = {}       # (group, name) -> patient ids stored in that partition
+        self._growth = LogFileGrowth()   # bytes of every partition file already seen
+
+        self._open = OrderedDict()
+        self._lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---------- partition bookkeeping ----------
+
+    def _group(self, patient_id):
+        return zlib.crc32(str(patient_id).encode("utf-8")) % self.patient_groups
+
+    def _partition_name(self, ts_ns):
+        return pd.Timestamp(ts_ns // self.period_ns * self.period_ns).strftime(self.NAME_FORMAT)
+
+    def _partition_start(self, name):
+        return pd.Timestamp(datetime.strptime(name, self.NAME_FORMAT))
+
+    def _partition_dir(self, group, name):
+        return os.path.join(self.root, f"g{group:02d}", name)
+
+    def _partitions(self, group=None):
+        """(group, name) pairs on disk, oldest period first."""
+        groups = [group] if group is not None else range(self.patient_groups)
+        found = []
+        for g in groups:
+            group_dir = os.path.join(self.root, f"g{g:02d}")
+            if os.path.isdir(group_dir):
+                found += [(g, name) for name in os.listdir(group_dir)]
+        return sorted(found, key=lambda key: (key[1], key[0]))
+
+    def _partition(self, group, name):
+        """Writable store for a partition, keeping at most max_open_partitions open."""
+        key = (group, name)
+        store = self._open.get(key)
+        if store is not None:
+            self._open.move_to_end(key)
+            return store
+        store = AppendOnlyStore(self._partition_dir(group, name), self.columns, growth=self._growth,
+                                **self.store_options)
+        self._open[key] = store
+        while len(self._open) > self.max_open_partitions:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+        return store
+
+    def _release(self, key):
+        store = self._open.pop(key, None)
+        if store is not None:
+            store.close()
+
+    def _read_partition(self, key):
+        store = self._open.get(key)
+        if store is not None:
+            df = store.read_all()
+        else:
+            df = AppendOnlyStore.read_directory(self._partition_dir(*key), self.columns)
+        self._members[key] = set(df["patient_id"].tolist())
+        return df
+
+    def _files(self, key):
+        """(base path, segment paths) of a partition."""
+        directory = self._partition_dir(*key)
+        return os.path.join(directory, "base.csv"), AppendOnlyStore.segment_paths(directory)
+
+    def _may_contain(self, key, patient_id):
+        """False only when the partition is known not to hold the patient."""
+        members = self._members.get(key)
+        return members is None or patient_id in members
+
+    def is_empty(self):
+        return not self._partitions()
+
+    # ---------- writes ----------
+
+    def append(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        stamps = pd.to_datetime(pd.Series([row.get("timestamp") for row in rows], dtype=object), errors="coerce")
+        now_ns = pd.Timestamp.now().value
+        buckets = {}
+        for row, ts in zip(rows, stamps):
+            # Undated rows are filed under the current period
+            name = self._partition_name(now_ns if pd.isna(ts) else ts.value)
+            buckets.setdefault((self._group(row.get("patient_id")), name), []).append(row)
+        with self._lock:
+            for (group, name), part_rows in buckets.items():
+                self._partition(group, name).append(part_rows)
+                members = self._members.get((group, name))
+                if members is not None:
+                    members.update(row.get("patient_id") for row in part_rows)
+
+    def replace(self, df):
+        with self._lock:
+            for key in list(self._open):
+                self._release(key)
+            self._members.clear()
+            self._growth.forget()
+            for g in range(self.patient_groups):
+                shutil.rmtree(os.path.join(self.root, f"g{g:02d}"), ignore_errors=True)
+            self.append(df.to_dict("records"))
+
+    # ---------- reads ----------
+
+    def _concat(self, frames):
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def read_all(self):
+        with self._lock:
+            return self._concat([self._read_partition(key) for key in self._partitions()])
+
+    def read_recent(self):
+        """Rows from the newest ``warm_partitions`` periods only."""
+        with self._lock:
+            keys = self._partitions()
+            self._growth.forget()
+            paths = []
+            for key in keys:
+                base_path, segments = self._files(key)
+                paths += [base_path] + segments
+            self._growth.rebase(paths)
+            names = sorted({name for _, name in keys})[-self.warm_partitions:]
+            self._warm_from = names[0] if names else ""
+            return self._concat([self._read_partition(key) for key in keys if key[1] in names])
+
+    def external_rows(self, patient_id=None):
+        """Rows others appended to the partitions of ``patient_id``'s group (every group if None)."""
+        frames, rewritten = [], False
+        with self._lock:
+            for key in self._partitions(None if patient_id is None else self._group(patient_id)):
+                base_path, segments = self._files(key)
+                found = self._growth.scan(self._partition_dir(*key), base_path, segments)
+                if found is None:
+                    rewritten = True
+                elif found:
+                    frames += found
+                    # Learn the partition's patients again when next needed
+                    self._members.pop(key, None)
+        if rewritten:
+            return None
+        return self._concat(frames)
+
+    def recent_covers(self, patient_id):
+        """True if none of the periods older than the warm-up read holds this patient.
+
+        Each partition's patient set is learned the first time it is read and
+        kept up to date on append, so this reads an old partition at most once.
+        """
+        if self._warm_from is None:
+            return False
+        with self._lock:
+            for key in self._partitions(self._group(patient_id)):
+                if key[1] >= self._warm_from:
+                    break
+                if key not in self._members:
+                    self._read_partition(key)
+                if patient_id in self._members[key]:
+                    return False
+        return True
+
+    def read_patient(self, patient_id, sensor_type=None, limit=None):
+        """Walk the patient's group newest period first, stopping once ``limit`` rows are found."""
+        frames, found = [], 0
+        with self._lock:
+            for key in reversed(self._partitions(self._group(patient_id))):
+                if not self._may_contain(key, patient_id):
+                    continue
+                rows = self.filter_patient(self._read_partition(key), patient_id, sensor_type)
+                frames.append(rows)
+                found += len(rows)
+                if limit is not None and found >= limit:
+                    break
+        rows = self._concat(frames[::-1])
+        return rows if limit is None else rows.tail(limit)
+
+    def read_range(self, patient_id, sensor_type=None, start=None, end=None):
+        start_ts = None if start is None else pd.Timestamp(start)
+        end_ts = None if end is None else pd.Timestamp(end)
+        frames = []
+        with self._lock:
+            for key in self._partitions(self._group(patient_id)):
+                begins = self._partition_start(key[1])
+                if end_ts is not None and begins > end_ts:
+                    continue
+                if start_ts is not None and begins + pd.Timedelta(self.period_ns, "ns") <= start_ts:
+                    continue
+                if not self._may_contain(key, patient_id):
+                    continue
+                frames.append(self.filter_patient(self._read_partition(key), patient_id, sensor_type))
+        return self.filter_range(self._concat(frames), start, end)
+
+    # ---------- maintenance ----------
+
+    def compact(self, include_current=False):
+        """Fold the segments of finished periods into each partition's base file."""
+        current = self._partition_name(pd.Timestamp.now().value)
+        with self._lock:
+            for key in self._partitions():
+                if key[1] >= current and not include_current:
+                    continue
+                if not self._has_segment_rows(self._partition_dir(*key)):
+                    continue
+                self._partition(*key).compact()
+                # Finished periods rarely get written again, so don't hold their files open
+                self._release(key)
+
+    def _has_segment_rows(self, directory):
+        header_size = len(",".join(self.columns)) + 2
+        return any(
+            name.startswith("segment-") and os.path.getsize(os.path.join(directory, name)) > header_size
+            for name in os.listdir(directory)
+        )
+
+    def apply_retention(self, now=None):
+        """Delete (or move under ``expired/``) partitions older than retention_days."""
+        if self.retention_days is None:
+            return 0
+        cutoff = pd.Timestamp(now or datetime.now()) - pd.Timedelta(days=self.retention_days)
+        expired = 0
+        with self._lock:
+            for key in self._partitions():
+                if self._partition_start(key[1]) + pd.Timedelta(self.period_ns, "ns") > cutoff:
+                    continue
+                self._release(key)
+                self._members.pop(key, None)
+                directory = self._partition_dir(*key)
+                self._growth.forget(directory, os.path.join(directory, "base.csv"))
+                if self.archive_expired:
+                    target = os.path.join(self.root, "expired", f"g{key[0]:02d}", key[1])
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.rename(directory, target)
+                else:
+                    shutil.rmtree(directory)
+                expired += 1
+        return expired
+
+    def maintain(self):
+        self.apply_retention()
+        self.compact()
+
+    def close(self):
+        with self._lock:
+            for key in list(self._open):
+                self._release(key)
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache of model outputs keyed on feature vectors.
+
+    Keys are (model version, rounded feature tuple). The cache remembers
+    which model version it holds and drops everything the first time it is
+    asked about a different one, so a hot-reloaded model never serves
+    stale predictions. ``shared(name, ...)`` returns one cache per model
+    file and set of options, shared by every predictor in the process.
+    """
+
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, max_entries=4096, ttl=300.0, decimals=2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.decimals = decimals
+        self.version = None
+        self._entries = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @classmethod
+    def shared(cls, name, max_entries=4096, ttl=300.0, decimals=2):
+        key = (name, max_entries, ttl, decimals)
+        with cls._caches_lock:
+            cache = cls._caches.get(key)
+            if cache is None:
+                cache = cls._caches[key] = cls(max_entries, ttl, decimals)
+            return cache
+
+    def get_many(self, version, keys):
+        """Cached values for ``keys`` (None where missing) and the indices that missed."""
+        now = time.monotonic()
+        values = [None] * len(keys)
+        missing = []
+        with self._lock:
+            self._check_version(version)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] < now:
+                    del self._entries[key]
+                    self.stats["expirations"] += 1
+                    entry = None
+                if entry is None:
+                    missing.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    values[i] = entry[0]
+            self.stats["hits"] += len(keys) - len(missing)
+            self.stats["misses"] += len(missing)
+        return values, missing
+
+    def put_many(self, version, keys, values):
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            self._check_version(version)
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self.version = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_statistics(self):
+        with self._lock:
+            stats = dict(self.stats, size=len(self._entries), model_version=self.version)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
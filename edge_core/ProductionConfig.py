@@ -3,7 +3,19 @@ import os
 class ProductionConfig:
     """Handles configuration for model paths and data locations."""
 
-    def __init__(self, model_path=None, data_path="data/vitals.csv", update_interval=10):
+    def __init__(self, model_path=None, data_path="data/vitals.csv", update_interval=10,
+                 segment_max_rows=10000, compact_after=8, fsync=False, history_depth=256,
+                 group_commit=False, commit_max_rows=500, commit_max_wait=0.2,
+                 storage_backend="segments", db_path=None, partition_hours=24, patient_groups=16,
+                 retention_days=None, archive_expired=False, maintenance_interval=None,
+                 ingest_address=None, ingest_authkey=None, model_reload_interval=2.0,
+                 compiled_model_path=None, inference_max_batch=64, inference_max_wait_ms=5.0,
+                 inference_workers=None, inference_latency_budget_ms=None, prediction_cache_size=4096,
+                 prediction_cache_ttl=300.0, prediction_cache_decimals=2, streaming_alerts=False,
+                 threshold_profiles_path="config/threshold_profiles.json", threshold_reload_interval=2.0,
+                 alert_history_per_patient=100, alert_log_max_events=10000, alert_log_max_age_s=86400,
+                 notification_sinks=None, notify_coalesce_s=5.0, notify_max_pending=1000, notify_max_queued=1000,
+                 notify_max_batch=50, notify_max_retries=5, warm_rows=200000):
         # Resolve paths relative to project root
         base_dir = os.path.dirname(os.path.abspath(__file__))  # edge_core folder
         project_root = os.path.dirname(base_dir)  # Go up to project root
@@ -12,10 +24,120 @@ class ProductionConfig:
         self.data_path = os.path.join(project_root, data_path)
         self.update_interval = update_interval
 
+        # Seconds between checks of the model file for changes (hot reload)
+        self.model_reload_interval = model_reload_interval
+
+        # NumPy-only export of the model (python -m edge_core export-model), preferred when current
+        self.compiled_model_path = compiled_model_path or os.path.splitext(self.model_path)[0] + ".npz"
+
+        # InferenceService micro-batching: batch size, max wait, pool size (None = CPU count), p99 budget
+        self.inference_max_batch = inference_max_batch
+        self.inference_max_wait_ms = inference_max_wait_ms
+        self.inference_workers = inference_workers
+        self.inference_latency_budget_ms = inference_latency_budget_ms
+
+        # Prediction memoisation: entries (0 disables), TTL seconds, feature rounding
+        self.prediction_cache_size = prediction_cache_size
+        self.prediction_cache_ttl = prediction_cache_ttl
+        self.prediction_cache_decimals = prediction_cache_decimals
+
+        # Alert on stateful rules (k-of-n, sustained, rate of change) rather than single readings
+        self.streaming_alerts = streaming_alerts
+
+        # Global/ward/patient alert threshold overrides (JSON, hot-reloaded; missing file = defaults)
+        self.threshold_profiles_path = os.path.join(project_root, threshold_profiles_path) if threshold_profiles_path else None
+        self.threshold_reload_interval = threshold_reload_interval
+
+        # Alert history: alerts kept per patient, and size/age bounds of the global log
+        self.alert_history_per_patient = alert_history_per_patient
+        self.alert_log_max_events = alert_log_max_events
+        self.alert_log_max_age_s = alert_log_max_age_s
+
+        # Alert notifications: sinks ("stdout", "file:<path>", webhook URL), per-patient coalescing
+        # window, bounds of the open-window and per-sink queues, sink batch size and retries
+        self.notification_sinks = notification_sinks
+        self.notify_coalesce_s = notify_coalesce_s
+        self.notify_max_pending = notify_max_pending
+        self.notify_max_queued = notify_max_queued
+        self.notify_max_batch = notify_max_batch
+        self.notify_max_retries = notify_max_retries
+
+        # Append-only vitals log: rows per segment, sealed segments before compaction
+        self.segment_max_rows = segment_max_rows
+        self.compact_after = compact_after
+        self.fsync = fsync
+
+        # Recent readings kept in memory per (patient, sensor) series
+        self.history_depth = history_depth
+
+        # SQLite backend: newest rows read at startup to warm the in-memory indexes (None = all)
+        self.warm_rows = warm_rows
+
+        # Group commit: buffer readings and flush every N rows or max_wait seconds
+        self.group_commit = group_commit
+        self.commit_max_rows = commit_max_rows
+        self.commit_max_wait = commit_max_wait
+
+        # Storage backend: "segments" (append-only CSV log), "partitioned" (time/patient-group
+        # partitions of segment logs) or "sqlite" (WAL database)
+        self.storage_backend = storage_backend
+        self.db_path = os.path.join(project_root, db_path) if db_path else os.path.splitext(self.data_path)[0] + ".db"
+
+        # Partitioned backend: period length, patient hash groups and retention
+        self.partition_hours = partition_hours
+        self.patient_groups = patient_groups
+        self.retention_days = retention_days
+        self.archive_expired = archive_expired
+
+        # Seconds between background compaction/retention runs (None disables)
+        self.maintenance_interval = maintenance_interval
+
+        # Single-writer ingest daemon: Unix socket path or "host:port", and shared auth key
+        # (required for non-loopback TCP addresses; None uses a built-in key locally)
+        self.ingest_address = ingest_address or os.path.join(project_root, "data", "ingest.sock")
+        self.ingest_authkey = ingest_authkey
+
     def get_config(self):
         """Return config details as a dictionary."""
         return {
             "model_path": self.model_path,
             "data_path": self.data_path,
-            "update_interval": self.update_interval
+            "update_interval": self.update_interval,
+            "model_reload_interval": self.model_reload_interval,
+            "compiled_model_path": self.compiled_model_path,
+            "inference_max_batch": self.inference_max_batch,
+            "inference_max_wait_ms": self.inference_max_wait_ms,
+            "inference_workers": self.inference_workers,
+            "inference_latency_budget_ms": self.inference_latency_budget_ms,
+            "prediction_cache_size": self.prediction_cache_size,
+            "prediction_cache_ttl": self.prediction_cache_ttl,
+            "prediction_cache_decimals": self.prediction_cache_decimals,
+            "streaming_alerts": self.streaming_alerts,
+            "threshold_profiles_path": self.threshold_profiles_path,
+            "threshold_reload_interval": self.threshold_reload_interval,
+            "alert_history_per_patient": self.alert_history_per_patient,
+            "alert_log_max_events": self.alert_log_max_events,
+            "alert_log_max_age_s": self.alert_log_max_age_s,
+            "notification_sinks": self.notification_sinks,
+            "notify_coalesce_s": self.notify_coalesce_s,
+            "notify_max_pending": self.notify_max_pending,
+            "notify_max_queued": self.notify_max_queued,
+            "notify_max_batch": self.notify_max_batch,
+            "notify_max_retries": self.notify_max_retries,
+            "segment_max_rows": self.segment_max_rows,
+            "compact_after": self.compact_after,
+            "fsync": self.fsync,
+            "history_depth": self.history_depth,
+            "warm_rows": self.warm_rows,
+            "group_commit": self.group_commit,
+            "commit_max_rows": self.commit_max_rows,
+            "commit_max_wait": self.commit_max_wait,
+            "storage_backend": self.storage_backend,
+            "db_path": self.db_path,
+            "partition_hours": self.partition_hours,
+            "patient_groups": self.patient_groups,
+            "retention_days": self.retention_days,
+            "archive_expired": self.archive_expired,
+            "maintenance_interval": self.maintenance_interval,
+            "ingest_address": self.ingest_address
         }
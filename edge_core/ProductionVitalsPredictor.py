@@ -1,20 +1,24 @@
-import os
-import pickle
+import numpy as np
 import pandas as pd
 
+from .ModelRegistry import ModelRegistry
+from .OnlineVitalsFeatures import OnlineVitalsFeatures
+from .PredictionCache import PredictionCache
+from .VitalsFeatureExtractor import VitalsFeatureExtractor
+
 class ProductionVitalsPredictor:
     """Predicts patient vitals trends from history."""
 
     def __init__(self, config):
-        model_path = config.model_path
-
-        # Load model if available
-        if not os.path.exists(model_path):
-            print(f"⚠️ Model file missing at {model_path}, using dummy model")
-            self.model = None
-        else:
-            with open(model_path, "rb") as f:
-                self.model = pickle.load(f)
+        # Shared per process; loaded on first prediction (the compiled export when it matches the
+        # pickle) and hot-reloaded when either file changes
+        self.registry = ModelRegistry.shared(config.model_path, compiled_path=config.compiled_model_path,
+                                             check_interval=config.model_reload_interval)
+        self.cache = None
+        if config.prediction_cache_size:
+            self.cache = PredictionCache.shared(self.registry.path, max_entries=config.prediction_cache_size,
+                                                ttl=config.prediction_cache_ttl,
+                                                decimals=config.prediction_cache_decimals)
 
         # Define the required feature order
         self.required_features = [
@@ -24,6 +28,12 @@ class ProductionVitalsPredictor:
             "oxygen_saturation",
             "temperature"
         ]
+        self.feature_extractor = VitalsFeatureExtractor()
+        self.online_features = OnlineVitalsFeatures()
+
+    @property
+    def model(self):
+        return self.registry.model()
 
     def predict(self, features_df: pd.DataFrame):
         """Make prediction using model or dummy output if model is missing."""
@@ -36,69 +46,69 @@ class ProductionVitalsPredictor:
         features_df = features_df[self.required_features]
         features_df = features_df.fillna(0)
 
-        if self.model is None:
+        model, version = self.registry.get()
+        if model is None:
             # Dummy prediction to avoid crashing
             return [0] * len(features_df)
-        return self.model.predict(features_df)
+        if self.cache is None:
+            return model.predict(features_df)
+
+        # Memoised on the rounded feature vector; only cache misses reach the model
+        features = np.round(features_df.to_numpy(dtype=np.float64), self.cache.decimals)
+        keys = [tuple(row) for row in features.tolist()]
+        values, missing = self.cache.get_many(version, keys)
+        if missing:
+            fresh = model.predict(pd.DataFrame(features[missing], columns=self.required_features))
+            self.cache.put_many(version, [keys[i] for i in missing], fresh)
+            for i, value in zip(missing, fresh):
+                values[i] = value
+        return np.asarray(values)
 
     def predict_trend(self, patient_id, history):
         """Predict future trend from patient's vitals history."""
-        if not history:
-            return None
-
-        df = pd.DataFrame(history)
-
-        # Start with default values
-        features = {
-            "heart_rate": 70,
-            "bp_systolic": 120,
-            "bp_diastolic": 80,
-            "oxygen_saturation": 98,
-            "temperature": 36.5
-        }
-
-        # Update from recent history if available
-        try:
-            hr = pd.to_numeric(df[df["sensor"].isin(["ECG", "heart_rate"])]["value"], errors="coerce").dropna()
-            if not hr.empty:
-                features["heart_rate"] = hr.iloc[-1]
-        except Exception:
-            pass
-
-        try:
-            bp_values = df[df["sensor"].isin(["BP_SYS", "BP", "blood_pressure"])]["value"].dropna()
-            if not bp_values.empty and "/" in str(bp_values.iloc[-1]):
-                sys_val, dia_val = bp_values.iloc[-1].split("/")
-                features["bp_systolic"] = pd.to_numeric(sys_val, errors="coerce")
-                features["bp_diastolic"] = pd.to_numeric(dia_val, errors="coerce")
-        except Exception:
-            pass
-
-        try:
-            spo2 = pd.to_numeric(df[df["sensor"].isin(["SpO2", "oxygen_saturation"])]["value"], errors="coerce").dropna()
-            if not spo2.empty:
-                features["oxygen_saturation"] = spo2.iloc[-1]
-        except Exception:
-            pass
-
-        try:
-            temp = pd.to_numeric(df[df["sensor"].isin(["Temp", "temperature"])]["value"], errors="coerce").dropna()
-            if not temp.empty:
-                features["temperature"] = temp.iloc[-1]
-        except Exception:
-            pass
-
-        # Convert features to DataFrame
-        feature_df = pd.DataFrame([features])
-
-        # Predict
-        y_pred = self.predict(feature_df)
-
+        return self.predict_trend_many({patient_id: history}).get(patient_id)
+
+    def predict_trend_many(self, histories):
+        """Predict trends for many patients with a single model call.
+
+        ``histories`` maps patient_id to a vitals history list; returns
+        patient_id -> result dict (patients with empty history get None).
+        """
+        results = {pid: None for pid, history in histories.items() if not history}
+        patient_ids = [pid for pid, history in histories.items() if history]
+        if not patient_ids:
+            return results
+
+        # One feature row per patient, one model call for all of them
+        features = self.feature_extractor.matrix([histories[pid] for pid in patient_ids])
+        results.update(self._predict_rows(patient_ids, features))
+        return results
+
+    def observe(self, readings):
+        """Update the online feature state with new readings (O(1) each)."""
+        self.online_features.update_many(readings)
+
+    def predict_latest(self, patient_ids):
+        """Predict trends from the online feature state, with a single model call.
+
+        Patients with no observed readings get None.
+        """
+        results = {pid: None for pid in patient_ids if pid not in self.online_features}
+        known = [pid for pid in patient_ids if pid in self.online_features]
+        if known:
+            results.update(self._predict_rows(known, self.online_features.matrix(known)))
+        return results
+
+    def _predict_rows(self, patient_ids, features):
+        y_pred = self.predict(pd.DataFrame(features, columns=self.required_features))
+        return {pid: self._trend_result(value) for pid, value in zip(patient_ids, y_pred)}
+
+    def _trend_result(self, value):
         return {
             "prediction_type": "Vitals Trend",
-            "predicted_value": float(y_pred[0]) if len(y_pred) else 0,
+            "predicted_value": float(value),
             "confidence": 0.85 if self.model else 0.5,
             "uncertainty": 0.15 if self.model else 0.5,
             "risk_factors": [],
-            "risk": "high" if y_pred[0] > 150 else "normal"
+            "risk": "high" if value > 150 else "normal"
         }
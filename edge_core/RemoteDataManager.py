@@ -0,0 +1,75 @@
+import threading
+from multiprocessing.connection import Client
+
+from .IngestServer import IngestServer
+
+
+class RemoteDataManager:
+    """DataManager stand-in that forwards everything to an IngestServer.
+
+    Writes are sent without waiting for a reply; reads go to the daemon,
+    which first makes this client's earlier writes durable, so each client
+    sees its own writes. Safe to share between threads.
+    """
+
+    def __init__(self, config, address=None):
+        self.address = IngestServer.parse_address(address or config.ingest_address)
+        self._conn = Client(self.address, authkey=IngestServer.resolve_authkey(self.address, config.ingest_authkey))
+        self._lock = threading.Lock()
+
+    def _call(self, op, *args):
+        with self._lock:
+            self._conn.send((op, args))
+            status, result = self._conn.recv()
+        if status == "error":
+            raise RuntimeError(f"Ingest server error: {result}")
+        return result
+
+    # ---------- writes ----------
+
+    def store_vital_sign(self, vital):
+        self.store_vital_signs([vital])
+
+    def store_vital_signs(self, batch):
+        rows = [vital if isinstance(vital, dict) else vars(vital) for vital in batch]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.send(("store", rows))
+
+    def flush(self):
+        self._call("flush")
+
+    # ---------- reads ----------
+
+    def load_data(self):
+        return self._call("load_data")
+
+    def get_patient_vitals_history(self, patient_id, sensor_type=None, limit=30):
+        return self._call("history", patient_id, sensor_type, limit)
+
+    def get_vitals_range(self, patient_id, sensor_type=None, start=None, end=None):
+        return self._call("range", patient_id, sensor_type, start, end)
+
+    def read_range(self, patient_id, sensor_type, start=None, end=None):
+        return self._call("read_range", patient_id, sensor_type, start, end)
+
+    def get_rollup(self, patient_id, sensor_type, resolution="minute", start=None, end=None):
+        return self._call("rollup", patient_id, sensor_type, resolution, start, end)
+
+    def seal_before(self, cutoff):
+        return self._call("seal_before", cutoff)
+
+    def compact(self):
+        self._call("compact")
+
+    def server_stats(self):
+        return self._call("stats")
+
+    def store_prediction(self, prediction):
+        pass
+
+    def close(self):
+        with self._lock:
+            if not self._conn.closed:
+                self._conn.close()
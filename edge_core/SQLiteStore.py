@@ -0,0 +1,232 @@
+import os
+import sqlite3
+import threading
+import weakref
+
+import pandas as pd
+
+from .VitalsStore import VitalsStore, format_timestamp
+
+
+class _ConnectionHolder:
+    """Thread-local owner of one connection (weak-referenceable, unlike the connection)."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+class SQLiteStore(VitalsStore):
+    """SQLite (WAL mode) vitals backend with indexed per-patient lookups.
+
+    WAL lets any number of readers (Streamlit sessions) run alongside the
+    writer, and the (patient_id, sensor, timestamp) index turns history and
+    time-range queries into index seeks. Each thread gets its own connection,
+    closed when the thread exits.
+
+    Rows other processes insert are found by rowid: every append records the
+    rowids it took, and anything else above the last seen rowid is foreign.
+    """
+
+    TABLE = "vitals"
+
+    def __init__(self, path, columns, fsync=False, warm_rows=None):
+        self.path = path
+        self.columns = list(columns)
+        self.fsync = fsync
+        # Startup warm-up reads at most the newest warm_rows rows (None: everything)
+        self.warm_rows = warm_rows
+        self.recent_is_complete = True
+        self._warm_from_rowid = None
+        self._local = threading.local()
+        self._connections = {}   # id(holder) -> open connection
+        self._lock = threading.Lock()
+        self._seen_lock = threading.Lock()
+        self._seen_rowid = 0
+        self._unseen = []   # (after, upto] rowid ranges other writers filled before one of our appends
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._create_schema()
+
+        cols = ", ".join(self.columns)
+        marks = ", ".join("?" for _ in self.columns)
+        self._insert_sql = f"INSERT INTO {self.TABLE} ({cols}) VALUES ({marks})"
+        self._select_cols = cols
+
+    # ---------- connections ----------
+
+    def _conn(self):
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+            holder = self._local.holder = _ConnectionHolder(conn)
+            with self._lock:
+                self._connections[id(holder)] = conn
+            # The thread-local holder dies with its thread (e.g. each Streamlit rerun): close then
+            weakref.finalize(holder, self._release, id(holder))
+        return holder.conn
+
+    def _release(self, key):
+        with self._lock:
+            conn = self._connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+    def _create_schema(self):
+        types = {"patient_id": "TEXT", "timestamp": "TEXT", "sensor": "TEXT", "value": ""}
+        col_defs = ", ".join(f"{col} {types.get(col, 'REAL')}".strip() for col in self.columns)
+        conn = self._conn()
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.TABLE} ({col_defs})")
+            # Databases created before a column was added get it appended in place
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.TABLE})")}
+            for col in self.columns:
+                if col not in existing:
+                    conn.execute(f"ALTER TABLE {self.TABLE} ADD COLUMN {col} {types.get(col, 'REAL')}".strip())
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_patient_sensor_ts "
+                f"ON {self.TABLE} (patient_id, sensor, timestamp)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_patient_ts "
+                f"ON {self.TABLE} (patient_id, timestamp)"
+            )
+
+    # ---------- writes ----------
+
+    def _params(self, row):
+        params = []
+        for col in self.columns:
+            val = row.get(col)
+            if col == "timestamp":
+                val = format_timestamp(val)
+            elif val is not None and pd.isna(val):
+                val = None
+            params.append(val)
+        return params
+
+    def append(self, rows):
+        params = [self._params(row) for row in rows]
+        if not params:
+            return
+        conn = self._conn()
+        with self._seen_lock:
+            with conn:
+                # Immediate: our rowids are exactly the ones after ``before``
+                conn.execute("BEGIN IMMEDIATE")
+                before = self._max_rowid(conn)
+                conn.executemany(self._insert_sql, params)
+                after = self._max_rowid(conn)
+            if before > self._seen_rowid:
+                self._unseen.append((self._seen_rowid, before))
+            self._seen_rowid = after
+
+    def replace(self, df):
+        conn = self._conn()
+        with self._seen_lock:
+            with conn:
+                conn.execute(f"DELETE FROM {self.TABLE}")
+                conn.executemany(self._insert_sql, [self._params(row) for row in df.to_dict("records")])
+            self._seen_rowid, self._unseen = self._max_rowid(conn), []
+
+    def _max_rowid(self, conn=None):
+        return (conn or self._conn()).execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {self.TABLE}").fetchone()[0]
+
+    @staticmethod
+    def stored_timestamp(ts):
+        return format_timestamp(ts)
+
+    def is_empty(self):
+        return self._conn().execute(f"SELECT 1 FROM {self.TABLE} LIMIT 1").fetchone() is None
+
+    # ---------- reads ----------
+
+    def _query(self, where="", params=(), order="rowid", limit=None):
+        sql = f"SELECT {self._select_cols} FROM {self.TABLE}"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = tuple(params) + (int(limit),)
+        return pd.read_sql_query(sql, self._conn(), params=params)
+
+    def read_all(self):
+        return self._query()
+
+    def read_recent(self):
+        """The newest ``warm_rows`` rows, in write order."""
+        conn = self._conn()
+        with self._seen_lock:
+            self._seen_rowid, self._unseen = self._max_rowid(conn), []
+            top = self._seen_rowid
+        cutoff = None
+        if self.warm_rows is not None:
+            cutoff = conn.execute(f"SELECT rowid FROM {self.TABLE} WHERE rowid <= ? ORDER BY rowid DESC "
+                                  f"LIMIT 1 OFFSET ?", (top, int(self.warm_rows) - 1)).fetchone()
+        if cutoff is None:
+            self.recent_is_complete = True
+            return self._query("rowid <= ?", (top,))
+        self.recent_is_complete = False
+        self._warm_from_rowid = cutoff[0]
+        return self._query("rowid >= ? AND rowid <= ?", (cutoff[0], top))
+
+    def external_rows(self, patient_id=None):
+        conn = self._conn()
+        with self._seen_lock:
+            top = self._max_rowid(conn)
+            if top < self._seen_rowid:
+                # Rows were deleted elsewhere (a full replace): start over
+                self._seen_rowid, self._unseen = top, []
+                return None
+            ranges = self._unseen + ([(self._seen_rowid, top)] if top > self._seen_rowid else [])
+            self._seen_rowid, self._unseen = top, []
+        if not ranges:
+            return pd.DataFrame(columns=self.columns)
+        where = " OR ".join("(rowid > ? AND rowid <= ?)" for _ in ranges)
+        return self._query(where, [rowid for pair in ranges for rowid in pair])
+
+    def recent_covers(self, patient_id):
+        if self.recent_is_complete:
+            return True
+        # Index seek on (patient_id, ...): any row of this patient older than the warm-up read?
+        older = self._conn().execute(f"SELECT 1 FROM {self.TABLE} WHERE patient_id = ? AND rowid < ? LIMIT 1",
+                                     (patient_id, self._warm_from_rowid)).fetchone()
+        return older is None
+
+    def read_patient(self, patient_id, sensor_type=None, limit=None):
+        where, params = "patient_id = ?", [patient_id]
+        if sensor_type:
+            where += " AND sensor = ?"
+            params.append(sensor_type)
+        df = self._query(where, params, order="timestamp DESC, rowid DESC", limit=limit)
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def read_range(self, patient_id, sensor_type=None, start=None, end=None):
+        where, params = "patient_id = ?", [patient_id]
+        if sensor_type:
+            where += " AND sensor = ?"
+            params.append(sensor_type)
+        if start is not None:
+            where += " AND timestamp >= ?"
+            params.append(format_timestamp(start))
+        if end is not None:
+            where += " AND timestamp <= ?"
+            params.append(format_timestamp(end))
+        return self._query(where, params, order="timestamp, rowid")
+
+    # ---------- maintenance ----------
+
+    def compact(self):
+        """Checkpoint the WAL back into the main database file."""
+        self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
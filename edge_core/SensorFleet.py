@@ -0,0 +1,157 @@
+import asyncio
+import random
+import time
+
+from .SimulatedBloodPressureMonitor import SimulatedBloodPressureMonitor
+from .SimulatedECGSensor import SimulatedECGSensor
+from .SimulatedPulseOximeter import SimulatedPulseOximeter
+
+
+class SensorFleet:
+    """Drives many sensor devices on one asyncio event loop.
+
+    Each device gets its own coroutine that samples at the device's rate
+    (with +/- jitter as a fraction of the interval) and pushes readings onto
+    one bounded output queue. A full queue either blocks the device
+    (backpressure, the default) or drops the reading when ``drop_when_full``
+    is set. Devices can be added and removed while the fleet runs.
+    """
+
+    def __init__(self, queue_size=10000, drop_when_full=False):
+        self.queue_size = queue_size
+        self.drop_when_full = drop_when_full
+        self.queue = None
+        self._devices = {}
+        self._tasks = {}
+        self._running = False
+        self._started_at = None
+        self._cpu_started_at = None
+        self.stats = {"readings": 0, "dropped": 0, "late_ticks": 0}
+
+    @classmethod
+    def for_ward(cls, patient_ids, rate_hz=2.0, jitter=0.1, ecg_sample_rate=None, **kwargs):
+        """Fleet with an ECG, pulse oximeter and BP monitor per patient.
+
+        With ``ecg_sample_rate`` set, ECGs simulate the raw waveform at that
+        rate and report the heart rate derived from it.
+        """
+        fleet = cls(**kwargs)
+        for pid in patient_ids:
+            if ecg_sample_rate:
+                ecg = SimulatedECGSensor(pid, f"{pid}-ecg", interval=1.0 / rate_hz, waveform=True,
+                                         sample_rate=ecg_sample_rate)
+            else:
+                ecg = SimulatedECGSensor(pid, f"{pid}-ecg")
+            fleet.add_device(ecg, rate_hz, jitter)
+            fleet.add_device(SimulatedPulseOximeter(pid, f"{pid}-spo2"), rate_hz, jitter)
+            fleet.add_device(SimulatedBloodPressureMonitor(pid, f"{pid}-bp"), rate_hz, jitter)
+        return fleet
+
+    # ---------- device management ----------
+
+    def add_device(self, device, rate_hz=None, jitter=0.0):
+        """Register a device; it starts sampling at once if the fleet is running.
+
+        ``rate_hz`` defaults to the device's own ``interval``.
+        """
+        interval = 1.0 / rate_hz if rate_hz else getattr(device, "interval", 0.5)
+        self._devices[device.device_id] = (device, interval, jitter)
+        if self._running:
+            self._spawn(device.device_id)
+
+    def remove_device(self, device_id):
+        self._devices.pop(device_id, None)
+        task = self._tasks.pop(device_id, None)
+        if task is not None:
+            task.cancel()
+
+    def device_count(self):
+        return len(self._devices)
+
+    # ---------- lifecycle ----------
+
+    async def start(self):
+        if self._running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._running = True
+        self._started_at = time.perf_counter()
+        self._cpu_started_at = time.process_time()
+        for device_id in self._devices:
+            self._spawn(device_id)
+
+    async def stop(self):
+        self._running = False
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn(self, device_id):
+        self._tasks[device_id] = asyncio.get_running_loop().create_task(self._run_device(device_id))
+
+    async def _run_device(self, device_id):
+        device, interval, jitter = self._devices[device_id]
+        loop = asyncio.get_running_loop()
+        # Stagger start times so thousands of devices don't fire in lockstep
+        next_tick = loop.time() + random.uniform(0, interval)
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            if hasattr(device, "sample"):
+                reading = device.sample()
+            else:
+                reading = await device.read_data()
+            for item in reading if isinstance(reading, list) else [reading]:
+                if self.drop_when_full:
+                    try:
+                        self.queue.put_nowait(item)
+                    except asyncio.QueueFull:
+                        self.stats["dropped"] += 1
+                        continue
+                else:
+                    await self.queue.put(item)
+                self.stats["readings"] += 1
+
+            next_tick += interval * (1 + random.uniform(-jitter, jitter))
+            now = loop.time()
+            if next_tick < now:
+                # Fell behind (slow consumer or overloaded loop): skip missed ticks
+                self.stats["late_ticks"] += 1
+                next_tick = now
+
+    # ---------- consumers ----------
+
+    async def batches(self, max_batch=500):
+        """Yield lists of readings: waits for one, then takes whatever else is queued."""
+        while self._running or not self.queue.empty():
+            try:
+                first = await asyncio.wait_for(self.queue.get(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            batch = [first]
+            while len(batch) < max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            yield batch
+
+    async def drain_into(self, data_manager, max_batch=500):
+        """Stream readings into ``data_manager.store_vital_signs`` off the event loop."""
+        loop = asyncio.get_running_loop()
+        async for batch in self.batches(max_batch):
+            await loop.run_in_executor(None, data_manager.store_vital_signs, batch)
+
+    def get_statistics(self):
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        cpu = time.process_time() - self._cpu_started_at if self._cpu_started_at else 0.0
+        return {
+            "devices": len(self._devices),
+            "readings": self.stats["readings"],
+            "dropped": self.stats["dropped"],
+            "late_ticks": self.stats["late_ticks"],
+            "queued": self.queue.qsize() if self.queue else 0,
+            "readings_per_sec": self.stats["readings"] / elapsed if elapsed else 0.0,
+            "readings_per_cpu_sec": self.stats["readings"] / cpu if cpu else 0.0
+        }
@@ -4,12 +4,17 @@ from datetime import datetime
 
 class SimulatedBloodPressureMonitor:
     """Simulates Blood Pressure readings (systolic & diastolic)"""
-    def __init__(self, patient_id, device_id):
+    def __init__(self, patient_id, device_id, interval=0.5):
         self.patient_id = patient_id
         self.device_id = device_id
+        self.interval = interval
 
     async def read_data(self):
-        await asyncio.sleep(0.5)
+        await asyncio.sleep(self.interval)
+        return self.sample()
+
+    def sample(self):
+        """Take one reading immediately (used by SensorFleet, which owns the timing)."""
         systolic_value = random.randint(110, 140)
         diastolic_value = random.randint(70, 90)
 
@@ -2,15 +2,51 @@ import random
 import asyncio
 from datetime import datetime
 
+import numpy as np
+
+from .StreamingRPeakDetector import StreamingRPeakDetector
+
 class SimulatedECGSensor:
-    """Simulates ECG sensor readings"""
-    def __init__(self, patient_id, device_id):
+    """Simulates ECG sensor readings
+
+    With ``waveform=True`` the sensor synthesises a raw ECG lead at
+    ``sample_rate`` Hz in chunks covering ``interval`` seconds, runs each
+    chunk through a StreamingRPeakDetector and reports only the derived bpm.
+    The most recent chunk is kept on ``last_chunk``.
+    """
+
+    # P, Q, R, S and T waves as (position in the cardiac cycle, amplitude mV, width)
+    WAVES = np.array([
+        [0.20, 0.15, 0.025],
+        [0.34, -0.10, 0.007],
+        [0.36, 1.20, 0.008],
+        [0.38, -0.25, 0.008],
+        [0.60, 0.30, 0.045]
+    ])
+
+    def __init__(self, patient_id, device_id, interval=0.5, waveform=False, sample_rate=250):
         self.patient_id = patient_id
         self.device_id = device_id
+        self.interval = interval
         self.sensor_type = "ECG"
+        self.waveform = waveform
+        self.sample_rate = sample_rate
+        self.last_chunk = None
+        if waveform:
+            self._rng = np.random.default_rng()
+            self._true_bpm = float(self._rng.uniform(60, 100))
+            self._phase = float(self._rng.random())
+            self._t = 0.0
+            self.detector = StreamingRPeakDetector(sample_rate)
 
     async def read_data(self):
-        await asyncio.sleep(0.5)
+        await asyncio.sleep(self.interval)
+        return self.sample()
+
+    def sample(self):
+        """Take one reading immediately (used by SensorFleet, which owns the timing)."""
+        if self.waveform:
+            return self._sample_waveform()
         return {
             "patient_id": self.patient_id,
             "device_id": self.device_id,
@@ -20,3 +56,38 @@ class SimulatedECGSensor:
             "timestamp": datetime.now(),
             "quality_score": random.uniform(0.9, 1.0)
         }
+
+    def read_waveform(self, n_samples=None):
+        """Next chunk of the raw lead as a float32 array (mV), continuous with the last one."""
+        n = n_samples or max(int(round(self.interval * self.sample_rate)), 1)
+        # Heart rate drifts slowly, so RR intervals vary a little beat to beat
+        self._true_bpm = float(np.clip(self._true_bpm + self._rng.normal(0, 0.5), 45, 150))
+        phase = self._phase + np.arange(1, n + 1) * (self._true_bpm / 60.0 / self.sample_rate)
+        self._phase = float(phase[-1] % 1.0)
+        cycle = phase % 1.0
+
+        pos, amp, width = self.WAVES[:, 0:1], self.WAVES[:, 1:2], self.WAVES[:, 2:3]
+        signal = (amp * np.exp(-0.5 * ((cycle - pos) / width) ** 2)).sum(axis=0)
+
+        t = self._t + np.arange(n) / self.sample_rate
+        self._t = float(t[-1] + 1.0 / self.sample_rate)
+        signal += 0.05 * np.sin(2 * np.pi * 0.3 * t)              # baseline wander
+        signal += self._rng.normal(0, 0.02, size=n)               # sensor noise
+        self.last_chunk = signal.astype(np.float32)
+        return self.last_chunk
+
+    def _sample_waveform(self):
+        """Read a chunk, update the detector and return the bpm reading (or [] before the first RR)."""
+        self.detector.update(self.read_waveform())
+        bpm = self.detector.heart_rate()
+        if bpm is None:
+            return []
+        return {
+            "patient_id": self.patient_id,
+            "device_id": self.device_id,
+            "sensor_type": self.sensor_type,
+            "value": round(bpm),
+            "unit": "bpm",
+            "timestamp": datetime.now(),
+            "quality_score": random.uniform(0.9, 1.0)
+        }
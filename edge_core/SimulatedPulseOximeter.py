@@ -4,13 +4,18 @@ from datetime import datetime
 
 class SimulatedPulseOximeter:
     """Simulates Pulse Oximeter readings"""
-    def __init__(self, patient_id, device_id):
+    def __init__(self, patient_id, device_id, interval=0.5):
         self.patient_id = patient_id
         self.device_id = device_id
+        self.interval = interval
         self.sensor_type = "SpO2"
 
     async def read_data(self):
-        await asyncio.sleep(0.5)
+        await asyncio.sleep(self.interval)
+        return self.sample()
+
+    def sample(self):
+        """Take one reading immediately (used by SensorFleet, which owns the timing)."""
         return {
             "patient_id": self.patient_id,
             "device_id": self.device_id,
@@ -0,0 +1,156 @@
+import numpy as np
+
+from .VitalsStore import SENSOR_CODES
+
+
+class KOfNRule:
+    """Out of range in at least ``k`` of the last ``n`` readings.
+
+    Exits once no more than ``exit_k`` of the last ``n`` are out of range and
+    the latest reading is back inside the hysteresis band.
+    """
+
+    def __init__(self, sensor, k=3, n=5, exit_k=0):
+        self.code = SENSOR_CODES[sensor]
+        self.sensor, self.k, self.n, self.exit_k = sensor, k, n, exit_k
+        self.name = f"{sensor}:{k}of{n}"
+        self.description = f"{sensor} out of range in {k} of last {n} readings"
+        self._mask = (1 << n) - 1
+
+    def initial_state(self):
+        return [False, 0, 0]  # active, bitmask of recent out-of-range flags, popcount
+
+    def step(self, state, out, clear, value, ts_ns):
+        bits = state[1]
+        state[2] += out - ((bits >> (self.n - 1)) & 1)
+        state[1] = ((bits << 1) & self._mask) | out
+        if not state[0]:
+            return state[2] >= self.k
+        return not (state[2] <= self.exit_k and clear)
+
+
+class SustainedRule:
+    """Out of range continuously for at least ``seconds``; exits when back inside the band."""
+
+    def __init__(self, sensor, seconds=60):
+        self.code = SENSOR_CODES[sensor]
+        self.sensor, self.seconds = sensor, seconds
+        self.name = f"{sensor}:sustained{seconds}s"
+        self.description = f"{sensor} out of range for {seconds}s"
+
+    def initial_state(self):
+        return [False, None]  # active, start of the current excursion (ns)
+
+    def step(self, state, out, clear, value, ts_ns):
+        if out:
+            if state[1] is None:
+                state[1] = ts_ns
+        else:
+            state[1] = None
+        if not state[0]:
+            return state[1] is not None and ts_ns - state[1] >= self.seconds * 1e9
+        return not clear
+
+
+class RateOfChangeRule:
+    """Smoothed value changing faster than ``per_minute``; exits below ``exit_ratio`` of it.
+
+    The rate is measured on an EWMA of the readings between reference points
+    at least ``span_s`` apart, so a single noisy sample does not fire it.
+    """
+
+    def __init__(self, sensor, per_minute, span_s=60, alpha=0.3, exit_ratio=0.5):
+        self.code = SENSOR_CODES[sensor]
+        self.sensor, self.per_minute, self.span_s = sensor, per_minute, span_s
+        self.alpha, self.exit_ratio = alpha, exit_ratio
+        self.name = f"{sensor}:rate{per_minute}"
+        self.description = f"{sensor} changing faster than {per_minute}/min"
+
+    def initial_state(self):
+        return [False, None, None, None]  # active, smoothed value, reference value, reference time (ns)
+
+    def step(self, state, out, clear, value, ts_ns):
+        smooth = value if state[1] is None else state[1] + self.alpha * (value - state[1])
+        state[1] = smooth
+        if state[3] is None:
+            state[2], state[3] = smooth, ts_ns
+            return state[0]
+        elapsed = ts_ns - state[3]
+        if elapsed < self.span_s * 1e9:
+            return state[0]
+        rate = abs(smooth - state[2]) * 60e9 / elapsed
+        state[2], state[3] = smooth, ts_ns
+        if not state[0]:
+            return rate > self.per_minute
+        return rate >= self.exit_ratio * self.per_minute
+
+
+class StreamingAlertRules:
+    """Stateful alert rules evaluated one reading at a time.
+
+    Each (patient, rule) pair holds a small fixed-size state list, and a
+    reading only touches the rules for its sensor, so updates are O(1) per
+    reading and never re-read history. Range rules use enter/exit
+    hysteresis: a reading counts as out of range outside [low, high] but
+    only as clear inside [low + margin, high - margin], where the margin is
+    ``exit_margin`` of the range width. ``update_columns`` returns the enter
+    and exit transitions.
+    """
+
+    def __init__(self, rules=None, exit_margin=0.05):
+        self.rules = list(rules) if rules is not None else self.default_rules()
+        self.exit_margin = exit_margin
+        self._by_code = {}
+        for i, rule in enumerate(self.rules):
+            self._by_code.setdefault(rule.code, []).append(i)
+        self._state = {}   # patient_id -> [state per rule]
+
+    @staticmethod
+    def default_rules():
+        rules = []
+        for sensor in ("ECG", "BP_SYS", "BP_DIA", "SpO2", "Temp"):
+            rules.append(KOfNRule(sensor, k=3, n=5))
+            rules.append(SustainedRule(sensor, seconds=60))
+        rules += [RateOfChangeRule("ECG", 30), RateOfChangeRule("BP_SYS", 40), RateOfChangeRule("SpO2", 4)]
+        return rules
+
+    def update_columns(self, patient_ids, index, codes, values, stamps, low, high):
+        """Advance rule state over a columnar block (rows in arrival order).
+
+        ``low``/``high`` are the per-row thresholds. Returns a list of
+        transition dicts: patient_id, rule, event ("enter"/"exit"), value,
+        timestamp (ns).
+        """
+        margin = self.exit_margin * np.where(np.isfinite(high - low), high - low, 0.0)
+        out = ((values < low) | (values > high)).tolist()
+        clear = ((values >= low + margin) & (values <= high - margin)).tolist()
+
+        events = []
+        by_code = self._by_code
+        for row, (p, code, value, ts_ns) in enumerate(zip(index.tolist(), codes.tolist(),
+                                                          values.tolist(), stamps.tolist())):
+            rule_ids = by_code.get(code)
+            if not rule_ids:
+                continue
+            pid = patient_ids[p]
+            states = self._state.get(pid)
+            if states is None:
+                states = self._state[pid] = [rule.initial_state() for rule in self.rules]
+            for r in rule_ids:
+                state = states[r]
+                was_active = state[0]
+                state[0] = self.rules[r].step(state, int(out[row]), clear[row], value, ts_ns)
+                if state[0] != was_active:
+                    events.append({"patient_id": pid, "rule": self.rules[r], "event": "enter" if state[0] else "exit",
+                                   "value": value, "timestamp": ts_ns})
+        return events
+
+    def active(self, patient_id):
+        """Rules currently active for a patient."""
+        states = self._state.get(patient_id)
+        if states is None:
+            return []
+        return [rule for rule, state in zip(self.rules, states) if state[0]]
+
+    def drop(self, patient_id):
+        self._state.pop(patient_id, None)
@@ -0,0 +1,81 @@
+from collections import deque
+
+import numpy as np
+
+
+class StreamingRPeakDetector:
+    """Incremental R-peak detector that turns ECG sample chunks into heart rate.
+
+    A streaming take on Pan-Tompkins: first difference, squaring and a
+    moving-window integral, then a threshold a quarter of the way from the
+    running noise level to the running QRS level, with a refractory period.
+    Only a window-length tail of samples and a few scalars are kept between
+    chunks, so each ``update`` is O(len(chunk)) and nothing is recomputed
+    over past data.
+    """
+
+    def __init__(self, sample_rate=250, window_s=0.15, refractory_s=0.25, rr_history=8):
+        self.sample_rate = sample_rate
+        self.window = max(int(window_s * sample_rate), 1)
+        self.refractory = int(refractory_s * sample_rate)
+        self._tail = None                        # raw samples carried into the next chunk
+        self._above = False                      # integrated signal above threshold at chunk end
+        self._level = None                       # running estimate of QRS energy
+        self._noise = None                       # running estimate of background energy
+        self._samples_seen = 0
+        self._last_peak = None                   # absolute sample index of last beat
+        self._last_event = 0                     # last beat or threshold relaxation
+        self._rr = deque(maxlen=rr_history)      # recent RR intervals in samples
+
+    def update(self, chunk):
+        """Feed one chunk of samples; return absolute sample indices of new beats."""
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.size == 0:
+            return []
+
+        if self._tail is None:
+            self._tail = np.full(self.window + 1, chunk[0])
+        x = np.concatenate([self._tail, chunk])
+        energy = np.diff(x) ** 2
+        csum = np.concatenate([[0.0], np.cumsum(energy)])
+        # Moving-window integral ending at each new sample
+        integ = (csum[self.window:] - csum[:-self.window])[-chunk.size:] / self.window
+        self._tail = x[-(self.window + 1):]
+
+        # The chunk median is dominated by the stretches between QRS complexes
+        noise = float(np.median(integ))
+        if self._level is None:
+            self._level, self._noise = float(integ.max()), noise
+        else:
+            self._noise = 0.875 * self._noise + 0.125 * noise
+        threshold = self._noise + 0.25 * (self._level - self._noise)
+
+        above = integ > threshold
+        rising = np.flatnonzero(above & ~np.concatenate([[self._above], above[:-1]]))
+        self._above = bool(above[-1])
+
+        beats = []
+        for idx in rising:
+            position = self._samples_seen + int(idx)
+            if self._last_peak is not None and position - self._last_peak < self.refractory:
+                continue
+            # Track QRS energy from the local maximum that follows the crossing
+            peak_energy = float(integ[idx:idx + self.window].max())
+            self._level = 0.875 * self._level + 0.125 * peak_energy
+            if self._last_peak is not None:
+                self._rr.append(position - self._last_peak)
+            self._last_peak = self._last_event = position
+            beats.append(position)
+
+        self._samples_seen += chunk.size
+        # Nothing for two seconds: the threshold is probably too high, so relax it
+        if self._samples_seen - self._last_event > 2 * self.sample_rate:
+            self._level = self._noise + 0.5 * (self._level - self._noise)
+            self._last_event = self._samples_seen
+        return beats
+
+    def heart_rate(self):
+        """Heart rate in bpm from the median of recent RR intervals, or None."""
+        if not self._rr:
+            return None
+        return 60.0 * self.sample_rate / float(np.median(self._rr))
@@ -0,0 +1,145 @@
+from datetime import datetime
+
+import numpy as np
+
+
+class SyntheticVitalsGenerator:
+    """Vectorised synthetic vitals for load testing.
+
+    One ``generate`` call draws N patients x M timesteps x all sensors as a
+    single (N, M, S) array. Every patient has its own baseline and a latent
+    "stress" signal (circadian rhythm plus a random walk) that moves all
+    vitals together with physiologic signs: heart rate and BP up, SpO2 down.
+    Optional anomaly episodes (tachycardia, hypertension, desaturation,
+    fever) are injected at ``anomaly_rate`` per patient-step. The same seed
+    always produces the same data.
+    """
+
+    SENSORS = ["ECG", "BP_SYS", "BP_DIA", "SpO2", "Temp"]
+    UNITS = {"ECG": "bpm", "BP_SYS": "mmHg", "BP_DIA": "mmHg", "SpO2": "%", "Temp": "°C"}
+
+    # Per sensor: population mean, between-patient sd, within-patient noise sd,
+    # loading on the latent stress signal, physiologic clip range, decimals
+    BASELINE_MEAN = np.array([75.0, 120.0, 78.0, 97.5, 36.8])
+    BASELINE_SD = np.array([8.0, 10.0, 6.0, 1.0, 0.2])
+    NOISE_SD = np.array([3.0, 4.0, 3.0, 0.6, 0.08])
+    STRESS_LOADING = np.array([8.0, 10.0, 6.0, -1.0, 0.3])
+    CLIP_LOW = np.array([30.0, 60.0, 30.0, 60.0, 34.0])
+    CLIP_HIGH = np.array([220.0, 250.0, 150.0, 100.0, 42.0])
+    DECIMALS = [0, 0, 0, 1, 1]
+
+    # Anomaly episodes: per-sensor offsets applied while an episode is active
+    ANOMALIES = {
+        "tachycardia": np.array([45.0, 5.0, 3.0, 0.0, 0.0]),
+        "hypertension": np.array([5.0, 45.0, 25.0, 0.0, 0.0]),
+        "desaturation": np.array([10.0, 0.0, 0.0, -9.0, 0.0]),
+        "fever": np.array([15.0, 0.0, 0.0, -0.5, 1.8])
+    }
+
+    def __init__(self, seed=None, anomaly_rate=0.0, anomaly_duration=10):
+        if anomaly_duration < 1:
+            raise ValueError(f"anomaly_duration must be at least 1 step, got {anomaly_duration}")
+        self.seed = seed
+        self.anomaly_rate = anomaly_rate
+        self.anomaly_duration = anomaly_duration
+
+    def generate(self, n_patients, n_steps, interval=60, start=None, patient_prefix="P"):
+        """Return a cube dict with (N, M, S) ``values``/``quality``/``anomaly`` arrays.
+
+        Also included: ``patient_ids`` (N,), ``sensors`` (S,) and
+        ``timestamps`` (M,) as datetime64[ns], ``interval`` seconds apart
+        from ``start`` (by default chosen so the last step is now).
+        """
+        rng = np.random.default_rng(self.seed)
+        n_sensors = len(self.SENSORS)
+
+        step_ns = int(interval * 1e9)
+        if start is None:
+            start = np.datetime64(datetime.now(), "ns") - step_ns * (n_steps - 1)
+        timestamps = np.datetime64(start, "ns") + np.arange(n_steps, dtype=np.int64) * step_ns
+
+        # Latent stress: circadian sine with a random phase plus a random walk
+        hours = (timestamps - timestamps[0]).astype(np.int64) / 3.6e12
+        phase = rng.uniform(0, 2 * np.pi, size=(n_patients, 1))
+        circadian = 0.5 * np.sin(2 * np.pi * hours / 24.0 + phase)
+        walk = np.cumsum(rng.normal(0, 1, size=(n_patients, n_steps)), axis=1) / np.sqrt(max(n_steps, 1))
+        stress = circadian + walk
+
+        baseline = self.BASELINE_MEAN + rng.normal(0, 1, size=(n_patients, 1, n_sensors)) * self.BASELINE_SD
+        noise = rng.normal(0, 1, size=(n_patients, n_steps, n_sensors)) * self.NOISE_SD
+        values = baseline + stress[:, :, None] * self.STRESS_LOADING + noise
+
+        anomaly = np.zeros((n_patients, n_steps, n_sensors), dtype=bool)
+        if self.anomaly_rate > 0:
+            kinds = list(self.ANOMALIES)
+            starts = rng.random((n_patients, n_steps)) < self.anomaly_rate
+            kind = rng.integers(0, len(kinds), size=(n_patients, n_steps))
+            for k, name in enumerate(kinds):
+                active = self._active(starts & (kind == k), self.anomaly_duration)
+                offset = self.ANOMALIES[name]
+                values += active[:, :, None] * offset
+                anomaly |= active[:, :, None] & (offset != 0)
+
+        values = np.clip(values, self.CLIP_LOW, self.CLIP_HIGH)
+        for s, decimals in enumerate(self.DECIMALS):
+            values[:, :, s] = np.round(values[:, :, s], decimals)
+        quality = rng.uniform(0.9, 1.0, size=values.shape).astype(np.float32)
+
+        return {
+            "patient_ids": np.array([f"{patient_prefix}{i:05d}" for i in range(n_patients)], dtype=object),
+            "timestamps": timestamps,
+            "sensors": np.array(self.SENSORS, dtype=object),
+            "values": values,
+            "quality": quality,
+            "anomaly": anomaly
+        }
+
+    @staticmethod
+    def _active(starts, duration):
+        """Mark every step within ``duration`` steps after an episode start."""
+        counts = np.cumsum(starts, axis=1)
+        shifted = np.zeros_like(counts)
+        if duration < counts.shape[1]:
+            shifted[:, duration:] = counts[:, :-duration]
+        return (counts - shifted) > 0
+
+    # ---------- output formats ----------
+
+    @staticmethod
+    def columns(cube):
+        """Flatten a cube into 1-D columns in time order (timestamp, then patient, then sensor)."""
+        n, m, s = cube["values"].shape
+        order = (1, 0, 2)  # time-major
+        return {
+            "patient_id": np.broadcast_to(cube["patient_ids"][:, None, None], (n, m, s)).transpose(order).ravel(),
+            "timestamp": np.broadcast_to(cube["timestamps"][None, :, None], (n, m, s)).transpose(order).ravel(),
+            "sensor_type": np.broadcast_to(cube["sensors"][None, None, :], (n, m, s)).transpose(order).ravel(),
+            "value": cube["values"].transpose(order).ravel(),
+            "quality_score": cube["quality"].transpose(order).ravel(),
+            "anomaly": cube["anomaly"].transpose(order).ravel()
+        }
+
+    @classmethod
+    def iter_batches(cls, cube, batch_size=5000):
+        """Yield lists of reading dicts ready for ``DataManager.store_vital_signs``."""
+        cols = cls.columns(cube)
+        total = len(cols["value"])
+        for lo in range(0, total, batch_size):
+            hi = min(lo + batch_size, total)
+            stamps = cols["timestamp"][lo:hi].astype("datetime64[us]").tolist()
+            sensors = cols["sensor_type"][lo:hi]
+            yield [
+                {
+                    "patient_id": pid,
+                    "device_id": f"{pid}-{sensor.lower()}",
+                    "sensor_type": sensor,
+                    "value": value,
+                    "unit": cls.UNITS[sensor],
+                    "timestamp": ts,
+                    "quality_score": quality
+                }
+                for pid, sensor, value, ts, quality in zip(
+                    cols["patient_id"][lo:hi], sensors, cols["value"][lo:hi].tolist(),
+                    stamps, cols["quality_score"][lo:hi].tolist()
+                )
+            ]
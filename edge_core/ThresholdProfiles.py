@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .VitalsStore import SENSOR_CODES
+
+
+class ThresholdTable:
+    """One compiled snapshot: ``low``/``high`` of shape (n_profiles, n_codes).
+
+    Row 0 is the global profile, followed by a row per ward and per patient
+    with overrides, applied over the ward in its file entry (identical
+    ranges share a row). A patient's ward is the one given at lookup time,
+    else the one in its file entry; patients without overrides use their
+    ward's row, else row 0. A patient looked up in some other ward gets that
+    (ward, patient) row built the first time it is asked for.
+    """
+
+    def __init__(self, base, wards, overrides, patient_wards, codes, version):
+        self.base, self.wards = base, wards
+        self.overrides = overrides          # patient_id -> ranges replacing the ward's
+        self.patient_wards = patient_wards
+        self.codes = codes
+        self.version = version
+        self._lock = threading.Lock()
+        self._rows = {}                     # sorted ranges -> row
+        self._new = []                      # rows not yet in low/high
+        self.low = self.high = np.empty((0, max(SENSOR_CODES.values()) + 1))
+
+        self._row_of(base)
+        self.ward_rows = {ward: self._row_of(ranges) for ward, ranges in wards.items()}
+        self.patient_rows = {}              # (ward, patient_id) -> row
+        for pid in overrides:
+            ward = self._ward(patient_wards.get(pid))
+            self.patient_rows[(ward, pid)] = self._patient_row(ward, pid)
+        self._extend()
+
+    def _ward(self, ward):
+        return ward if ward in self.wards else None
+
+    def _row_of(self, ranges):
+        """Row number for ``ranges``, queueing a new row if no row has them yet."""
+        key = tuple(sorted(ranges.items()))
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._rows)
+            self._new.append(key)
+        return row
+
+    def _extend(self):
+        """Append the queued rows to ``low``/``high`` (swapped in, so readers' row numbers stay valid)."""
+        low = np.full((len(self._new), self.low.shape[1]), -np.inf)
+        high = np.full((len(self._new), self.low.shape[1]), np.inf)
+        for r, key in enumerate(self._new):
+            for name, (lo, hi) in key:
+                code = self.codes.get(name)
+                if code is not None:
+                    low[r, code], high[r, code] = lo, hi
+        self._new = []
+        self.low, self.high = np.vstack([self.low, low]), np.vstack([self.high, high])
+
+    def _patient_row(self, ward, patient_id):
+        ranges = dict(self.wards.get(ward, self.base))
+        ranges.update(self.overrides[patient_id])
+        return self._row_of(ranges)
+
+    def row(self, patient_id, ward=None):
+        ward = self._ward(self.patient_wards.get(patient_id) if ward is None else ward)
+        row = self.patient_rows.get((ward, patient_id))
+        if row is not None:
+            return row
+        if patient_id not in self.overrides:
+            return self.ward_rows.get(ward, 0)
+        with self._lock:
+            row = self.patient_rows.get((ward, patient_id))
+            if row is None:
+                row = self._patient_row(ward, patient_id)
+                self._extend()
+                # Published only once low/high hold the row
+                self.patient_rows[(ward, patient_id)] = row
+            return row
+
+    def rows(self, patient_ids, wards=None):
+        """Profile row for each patient id (``wards``: parallel list of ward names), as an int array."""
+        wards = wards if wards is not None else [None] * len(patient_ids)
+        return np.fromiter((self.row(pid, ward) for pid, ward in zip(patient_ids, wards)),
+                           dtype=np.int64, count=len(patient_ids))
+
+
+class ThresholdProfiles:
+    """Hot-reloaded alert thresholds with global -> ward -> patient overrides.
+
+    The profile file is JSON; every section is optional and ranges are
+    ``[low, high]`` keyed like ``AlertManager.thresholds``::
+
+        {
+          "global":   {"spo2": [94, 100]},
+          "profiles": {"pediatric": {"ecg": [80, 140]}, "copd": {"spo2": [88, 100]}},
+          "wards":    {"picu": {"profile": "pediatric"}},
+          "patients": {"P001": {"ward": "picu", "profile": "copd", "temp": [36.0, 38.0]}}
+        }
+
+    A patient's ranges are the defaults, then ``global``, then its ward (the
+    ward's named profile, then the ward's own ranges), then its own named
+    profile and ranges. The ward is the one passed at lookup (e.g. a twin's
+    ``ward`` key), falling back to the patient's ``ward`` entry. Each
+    distinct set of ranges becomes one row of a dense (profile, sensor code)
+    table, so a check is two array lookups however many overrides exist.
+    The file is re-checked at most every ``check_interval`` seconds and a
+    changed one is compiled off to the side and swapped in with one
+    assignment; a file that fails to parse keeps the previous table.
+    """
+
+    def __init__(self, defaults, path=None, check_interval=2.0, codes=None):
+        self.defaults = dict(defaults)
+        self.path = path
+        self.check_interval = check_interval
+        self.codes = codes or {"ecg": SENSOR_CODES["ECG"], "bp_systolic": SENSOR_CODES["BP_SYS"],
+                               "bp_diastolic": SENSOR_CODES["BP_DIA"], "spo2": SENSOR_CODES["SpO2"],
+                               "temp": SENSOR_CODES["Temp"]}
+        self._table = self.compile({}, version=0)
+        self._stat = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def table(self):
+        """Current ThresholdTable, re-reading the profile file when it changed."""
+        if self.path and time.monotonic() - self._checked_at >= self.check_interval:
+            self._refresh()
+        return self._table
+
+    def thresholds_for(self, patient_id, ward=None):
+        """{sensor name: (low, high)} in effect for one patient."""
+        table = self.table()
+        row = table.row(patient_id, ward)
+        return {name: (float(table.low[row, code]), float(table.high[row, code])) for name, code in self.codes.items()}
+
+    # ---------- compiling ----------
+
+    def compile(self, spec, version):
+        named = spec.get("profiles", {})
+
+        def overrides(entry, where):
+            ranges = {}
+            profile = entry.get("profile")
+            if profile is not None:
+                if profile not in named:
+                    print(f"⚠️ Unknown threshold profile '{profile}' in {where}")
+                else:
+                    ranges.update(self._ranges(named[profile]))
+            ranges.update(self._ranges(entry))
+            return ranges
+
+        base = dict(self.defaults)
+        base.update(self._ranges(spec.get("global", {})))
+        wards = {ward: dict(base, **overrides(entry, f"ward {ward}")) for ward, entry in spec.get("wards", {}).items()}
+        # Patient overrides are kept apart from the ward, so the ward can change at runtime
+        patients, patient_wards = {}, {}
+        for pid, entry in spec.get("patients", {}).items():
+            patient_wards[pid] = entry.get("ward")
+            if patient_wards[pid] is not None and patient_wards[pid] not in wards:
+                print(f"⚠️ Unknown ward '{patient_wards[pid]}' for patient {pid}")
+            patients[pid] = overrides(entry, f"patient {pid}")
+        return ThresholdTable(base, wards, patients, patient_wards, self.codes, version)
+
+    def _ranges(self, entry):
+        ranges = {}
+        for name, value in entry.items():
+            if name in ("profile", "ward"):
+                continue
+            if name not in self.codes:
+                print(f"⚠️ Unknown sensor '{name}' in threshold profiles")
+                continue
+            lo, hi = value
+            ranges[name] = (-np.inf if lo is None else float(lo), np.inf if hi is None else float(hi))
+        return ranges
+
+    # ---------- hot reload ----------
+
+    def _refresh(self):
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            self._checked_at = time.monotonic()
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                if self._stat is not None:
+                    # File removed: fall back to the defaults
+                    self._stat = None
+                    self._table = self.compile({}, version=self._table.version + 1)
+                    self.reloads += 1
+                return
+
+            stat = (st.st_mtime_ns, st.st_size)
+            if stat == self._stat:
+                return
+            try:
+                with open(self.path) as f:
+                    spec = json.load(f)
+                table = self.compile(spec, version=self._table.version + 1)
+            except Exception as e:
+                # Keep the previous table; warn once per version of the file
+                print(f"⚠️ Could not load threshold profiles from {self.path}: {e}")
+                self._stat = stat
+                return
+            if self._table.version:
+                self.reloads += 1
+            self._stat = stat
+            self._table = table
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+
+
+class VitalsFeatureExtractor:
+    """Turns vitals history lists into the predictor's feature vector.
+
+    One reverse pass over plain dicts: each reading's sensor is looked up in
+    ``SENSOR_FEATURES`` and its value fills that feature's slot unless a
+    newer reading already did. "120/80" style blood pressure readings fill
+    both BP slots. Missing features keep ``DEFAULTS``.
+    """
+
+    FEATURES = ["heart_rate", "bp_systolic", "bp_diastolic", "oxygen_saturation", "temperature"]
+    DEFAULTS = [70.0, 120.0, 80.0, 98.0, 36.5]
+
+    # Sensor name (device codes and stored column names) -> feature index
+    SENSOR_FEATURES = {
+        "ECG": 0, "heart_rate": 0,
+        "BP_SYS": 1, "bp_systolic": 1,
+        "BP_DIA": 2, "bp_diastolic": 2,
+        "SpO2": 3, "oxygen_saturation": 3,
+        "Temp": 4, "temperature": 4,
+        "BP": 1, "blood_pressure": 1
+    }
+
+    def __init__(self):
+        self.n_features = len(self.FEATURES)
+
+    def vector(self, history):
+        """Feature list for one patient, in ``FEATURES`` order."""
+        features = list(self.DEFAULTS)
+        missing = self.n_features
+        seen = [False] * self.n_features
+
+        for reading in reversed(history or []):
+            for idx, number in self.feature_values(reading):
+                if not seen[idx]:
+                    features[idx] = number
+                    seen[idx] = True
+                    missing -= 1
+            if not missing:
+                break
+        return features
+
+    @classmethod
+    def feature_values(cls, reading):
+        """(feature index, value) pairs carried by one reading; empty if it has none."""
+        index = cls.SENSOR_FEATURES.get(reading.get("sensor", reading.get("sensor_type")))
+        if index is None:
+            return ()
+        value = reading.get("value")
+        if isinstance(value, str) and "/" in value:
+            # Combined "sys/dia" blood pressure reading
+            parts = value.split("/")
+            pairs = ((1, cls._number(parts[0])), (2, cls._number(parts[1]) if len(parts) > 1 else None))
+        else:
+            pairs = ((index, cls._number(value)),)
+        return [(idx, number) for idx, number in pairs if number is not None]
+
+    def matrix(self, histories):
+        """(n_patients, n_features) float array, one row per history."""
+        return np.array([self.vector(history) for history in histories], dtype=np.float64).reshape(-1, self.n_features)
+
+    @staticmethod
+    def _number(value):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if math.isnan(number) else number
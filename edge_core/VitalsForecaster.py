@@ -0,0 +1,228 @@
+import threading
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .VitalsFeatureExtractor import VitalsFeatureExtractor
+from .VitalsStore import timestamp_ns
+
+
+class VitalsForecaster:
+    """Multi-horizon vitals forecasts from damped Holt (level + trend) smoothing.
+
+    Series follow ``VitalsFeatureExtractor.FEATURES`` order and are named as
+    in the app's ``forecast_data`` frames (``SERIES``). ``fit_many`` fits
+    every (patient, series) at once: histories are packed into NaN-padded
+    arrays and a small grid of smoothing parameters is scored by one-step
+    ahead error in a single vectorised pass, keeping the best pair and the
+    final level/trend. ``update`` then folds new readings into that cached
+    state in O(1) with the fitted parameters, and ``forecast_many`` projects
+    all requested patients to every horizon in one array expression. Steps
+    are readings; horizons in minutes are converted with each series' typical
+    sampling interval.
+    """
+
+    SERIES = ["heart_rate", "systolic_bp", "diastolic_bp", "oxygen_saturation", "body_temperature"]
+    HORIZONS = (15, 30, 60)
+
+    # Wide-frame column names (forecast_data, DataManager rows) -> series index
+    COLUMNS = {
+        "heart_rate": 0, "systolic_bp": 1, "bp_systolic": 1, "diastolic_bp": 2, "bp_diastolic": 2,
+        "oxygen_saturation": 3, "spo2": 3, "body_temperature": 4, "temperature": 4
+    }
+    CLIP_LOW = np.array([30.0, 60.0, 30.0, 60.0, 34.0])
+    CLIP_HIGH = np.array([220.0, 250.0, 150.0, 100.0, 42.0])
+
+    def __init__(self, horizons=HORIZONS, alphas=(0.1, 0.3, 0.5, 0.8), betas=(0.01, 0.05, 0.15, 0.3),
+                 damping=0.95, default_interval=60.0):
+        self.horizons = tuple(horizons)
+        grid = np.array([(a, b) for a in alphas for b in betas])
+        self.grid_alpha, self.grid_beta = grid[:, 0], grid[:, 1]
+        self.damping = damping
+        self.default_interval = default_interval
+        self.n_series = len(self.SERIES)
+        self._state = {}   # patient_id -> dict of (n_series,) arrays
+        self._lock = threading.Lock()
+
+    # ---------- fitting ----------
+
+    def fit_many(self, histories):
+        """Fit parameters and state for {patient_id: history list} in one vectorised pass."""
+        series = {pid: self._series_from_readings(history) for pid, history in histories.items()}
+        self._fit(series)
+
+    def fit_frame(self, patient_id, df):
+        """Fit one patient from a wide frame (``forecast_data`` layout: timestamp + vitals columns)."""
+        stamps = pd.to_datetime(df["timestamp"], errors="coerce")
+        ns = stamps.astype("int64").to_numpy()
+        per_series = [([], []) for _ in range(self.n_series)]
+        for column, idx in self.COLUMNS.items():
+            if column in df.columns and not per_series[idx][0]:
+                values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+                ok = ~np.isnan(values) & stamps.notna().to_numpy()
+                per_series[idx] = (list(ns[ok]), list(values[ok]))
+        self._fit({patient_id: per_series})
+
+    def _series_from_readings(self, history):
+        per_series = [([], []) for _ in range(self.n_series)]
+        for reading in history or []:
+            ts = reading.get("timestamp")
+            if ts is None:
+                continue
+            ts_ns = timestamp_ns(ts)
+            for idx, value in VitalsFeatureExtractor.feature_values(reading):
+                per_series[idx][0].append(ts_ns)
+                per_series[idx][1].append(value)
+        return per_series
+
+    def _fit(self, series):
+        """series: {pid: [(timestamps, values)] * n_series}."""
+        pids = list(series)
+        if not pids:
+            return
+        rows = [series[pid][s] for pid in pids for s in range(self.n_series)]
+        length = max([len(values) for _, values in rows] + [1])
+        values = np.full((len(rows), length), np.nan)
+        stamps = np.full((len(rows), length), np.nan)
+        for r, (ts, vals) in enumerate(rows):
+            if vals:
+                order = np.argsort(ts, kind="stable")
+                values[r, :len(vals)] = np.asarray(vals, dtype=np.float64)[order]
+                stamps[r, :len(vals)] = np.asarray(ts, dtype=np.float64)[order]
+
+        # Grid search: (rows, grid) state advanced through time, skipping padding
+        alpha, beta, phi = self.grid_alpha[None, :], self.grid_beta[None, :], self.damping
+        level = np.repeat(values[:, :1], len(self.grid_alpha), axis=1)
+        trend = np.zeros_like(level)
+        sse = np.zeros_like(level)
+        for t in range(1, length):
+            x = values[:, t:t + 1]
+            valid = ~np.isnan(x)
+            prediction = level + phi * trend
+            error = np.where(valid, x - prediction, 0.0)
+            sse += error * error
+            new_level = prediction + alpha * error
+            trend = np.where(valid, beta * (new_level - level) + (1 - beta) * phi * trend, trend)
+            level = np.where(valid, new_level, level)
+
+        best = np.argmin(sse, axis=1)
+        pick = np.arange(len(rows))
+        counts = (~np.isnan(values)).sum(axis=1)
+        gaps = np.diff(stamps, axis=1) / 1e9
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows: series with < 2 readings
+            interval = np.nanmedian(np.where(gaps > 0, gaps, np.nan), axis=1) if length > 1 else np.full(len(rows), np.nan)
+        interval = np.where(np.isnan(interval), self.default_interval, interval)
+        last_ns = np.max(np.where(np.isnan(stamps), -np.inf, stamps), axis=1)
+
+        shape = (len(pids), self.n_series)
+        fitted = {
+            "level": level[pick, best].reshape(shape),
+            "trend": trend[pick, best].reshape(shape),
+            "alpha": self.grid_alpha[best].reshape(shape),
+            "beta": self.grid_beta[best].reshape(shape),
+            "interval": interval.reshape(shape),
+            "last_ns": np.where(counts > 0, last_ns, np.nan).reshape(shape),
+            "count": counts.reshape(shape)
+        }
+        with self._lock:
+            for i, pid in enumerate(pids):
+                state = {key: array[i].astype(np.float64) for key, array in fitted.items()}
+                unseen = state["count"] == 0
+                state["level"][unseen] = np.nan
+                state["trend"][unseen] = 0.0
+                self._state[pid] = state
+
+    # ---------- incremental updates ----------
+
+    def update(self, readings):
+        """Fold new readings into the cached state, O(1) each, with the fitted parameters."""
+        phi = self.damping
+        with self._lock:
+            for reading in readings:
+                reading = reading if isinstance(reading, dict) else vars(reading)
+                pairs = VitalsFeatureExtractor.feature_values(reading)
+                if not pairs:
+                    continue
+                ts = reading.get("timestamp")
+                ts_ns = float(timestamp_ns(ts if ts is not None else datetime.now()))
+                state = self._state.get(reading["patient_id"])
+                if state is None:
+                    state = self._state[reading["patient_id"]] = self._empty_state()
+                for idx, value in pairs:
+                    if state["count"][idx] == 0:
+                        state["level"][idx], state["trend"][idx] = value, 0.0
+                    else:
+                        previous = state["level"][idx]
+                        prediction = previous + phi * state["trend"][idx]
+                        level = prediction + state["alpha"][idx] * (value - prediction)
+                        beta = state["beta"][idx]
+                        state["trend"][idx] = beta * (level - previous) + (1 - beta) * phi * state["trend"][idx]
+                        state["level"][idx] = level
+                        gap = (ts_ns - state["last_ns"][idx]) / 1e9
+                        if gap > 0:
+                            state["interval"][idx] += 0.1 * (gap - state["interval"][idx])
+                    state["last_ns"][idx] = ts_ns if np.isnan(state["last_ns"][idx]) else max(state["last_ns"][idx], ts_ns)
+                    state["count"][idx] += 1
+
+    def _empty_state(self):
+        n = self.n_series
+        return {
+            "level": np.full(n, np.nan), "trend": np.zeros(n),
+            "alpha": np.full(n, 0.3), "beta": np.full(n, 0.05),
+            "interval": np.full(n, self.default_interval), "last_ns": np.full(n, np.nan),
+            "count": np.zeros(n)
+        }
+
+    def drop(self, patient_id):
+        with self._lock:
+            self._state.pop(patient_id, None)
+
+    # ---------- forecasts ----------
+
+    def forecast_matrix(self, patient_ids, horizons=None):
+        """(n_patients, n_series, n_horizons) forecasts; NaN for series never seen."""
+        horizons = np.asarray(horizons or self.horizons, dtype=np.float64)
+        with self._lock:
+            states = [self._state.get(pid) or self._empty_state() for pid in patient_ids]
+            level = np.array([s["level"] for s in states]).reshape(-1, self.n_series)
+            trend = np.array([s["trend"] for s in states]).reshape(-1, self.n_series)
+            interval = np.array([s["interval"] for s in states]).reshape(-1, self.n_series)
+
+        # Damped trend over k steps: phi + phi^2 + ... + phi^k (k may be fractional)
+        steps = horizons[None, None, :] * 60.0 / interval[:, :, None]
+        phi = self.damping
+        damped = phi * (1 - phi ** steps) / (1 - phi) if phi < 1 else steps
+        forecast = level[:, :, None] + trend[:, :, None] * damped
+        return np.clip(forecast, self.CLIP_LOW[None, :, None], self.CLIP_HIGH[None, :, None])
+
+    def forecast_many(self, patient_ids, horizons=None):
+        """{patient_id: {series: {horizon_min: value}}}, leaving out series never seen."""
+        horizons = tuple(horizons or self.horizons)
+        matrix = self.forecast_matrix(patient_ids, horizons)
+        return {
+            pid: {
+                name: {h: float(matrix[i, s, k]) for k, h in enumerate(horizons)}
+                for s, name in enumerate(self.SERIES) if not np.isnan(matrix[i, s, 0])
+            }
+            for i, pid in enumerate(patient_ids)
+        }
+
+    def forecast_frame(self, patient_id, horizons=None):
+        """Forecast rows in the ``forecast_data`` layout, one per horizon, stamped from the last reading."""
+        horizons = tuple(horizons or self.horizons)
+        matrix = self.forecast_matrix([patient_id], horizons)[0]
+        with self._lock:
+            state = self._state.get(patient_id)
+            last = np.nanmax(state["last_ns"]) if state is not None and not np.isnan(state["last_ns"]).all() else None
+        origin = pd.Timestamp(int(last)) if last is not None else pd.Timestamp(datetime.now())
+        frame = pd.DataFrame({
+            "timestamp": [(origin + pd.Timedelta(minutes=h)).strftime("%Y-%m-%d %H:%M:%S") for h in horizons],
+            "horizon_min": list(horizons)
+        })
+        for s, name in enumerate(self.SERIES):
+            if not np.isnan(matrix[s, 0]):
+                frame[name] = np.round(matrix[s], 1)
+        return frame
@@ -0,0 +1,179 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class VitalsReplayer:
+    """Replays recorded vitals through ingest -> prediction -> alerts.
+
+    Readings are replayed in timestamp order, in bursts of readings that
+    share a timestamp. With ``speed`` set and ``keep_timing`` on, the
+    original inter-arrival gaps are kept, divided by ``speed``. With
+    ``speed=None`` readings go out as fast as the pipeline takes them, in
+    batches of ``batch_size``. ``run()`` returns throughput, per-stage
+    latency percentiles and how far the replay fell behind schedule.
+    Predictions use the predictor's online feature state unless
+    ``online_features`` is off, in which case each burst re-reads the last
+    ``history_limit`` readings per patient.
+    """
+
+    STAGES = ["ingest", "predict", "alert", "end_to_end"]
+
+    def __init__(self, data_manager, predictor, alert_manager, speed=None, keep_timing=True,
+                 batch_size=500, history_limit=30, online_features=True):
+        self.data_manager = data_manager
+        self.predictor = predictor
+        self.alert_manager = alert_manager
+        self.speed = speed
+        self.keep_timing = keep_timing and speed is not None
+        self.batch_size = batch_size
+        self.history_limit = history_limit
+        self.online_features = online_features
+
+    # ---------- sources ----------
+
+    @staticmethod
+    def load_csv(path):
+        """Read a DataManager CSV export (or a data_path base file)."""
+        return pd.read_csv(path)
+
+    @staticmethod
+    def from_columns(columns):
+        """Frame from 1-D columns, e.g. SyntheticVitalsGenerator.columns()."""
+        return pd.DataFrame({
+            "patient_id": columns["patient_id"],
+            "timestamp": columns["timestamp"],
+            "sensor": columns.get("sensor_type", columns.get("sensor")),
+            "value": columns["value"],
+            "quality_score": columns.get("quality_score")
+        })
+
+    @staticmethod
+    def _to_readings(df):
+        """Readings sorted by time, plus their timestamps as epoch ns."""
+        df = df.copy()
+        df["_ts"] = pd.to_datetime(df["timestamp"], errors="coerce")
+        sensor_col = "sensor" if "sensor" in df.columns else "sensor_type"
+        df = df[df["_ts"].notna() & df[sensor_col].notna()].sort_values("_ts", kind="stable")
+        has_quality = "quality_score" in df.columns
+        readings = [
+            {
+                "patient_id": pid,
+                "sensor_type": sensor,
+                "value": value,
+                "timestamp": ts.to_pydatetime(),
+                "quality_score": quality if has_quality else None
+            }
+            for pid, sensor, value, ts, quality in zip(
+                df["patient_id"], df[sensor_col], df["value"], df["_ts"],
+                df["quality_score"] if has_quality else [None] * len(df)
+            )
+        ]
+        return readings, df["_ts"].astype("int64").to_numpy()
+
+    def _bursts(self, stamps):
+        """(lo, hi) index ranges to replay together."""
+        if not self.keep_timing:
+            return [(lo, min(lo + self.batch_size, len(stamps))) for lo in range(0, len(stamps), self.batch_size)]
+        # Same-timestamp readings arrive together, capped at batch_size
+        edges = np.flatnonzero(np.diff(stamps)) + 1
+        bounds = np.concatenate([[0], edges, [len(stamps)]])
+        bursts = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            for start in range(lo, hi, self.batch_size):
+                bursts.append((int(start), int(min(start + self.batch_size, hi))))
+        return bursts
+
+    # ---------- replay ----------
+
+    def _process(self, batch, timings):
+        t0 = time.perf_counter()
+        self.data_manager.store_vital_signs(batch)
+        t1 = time.perf_counter()
+        timings["ingest"].append(t1 - t0)
+
+        by_patient = {}
+        for reading in batch:
+            by_patient.setdefault(reading["patient_id"], []).append(reading)
+
+        p0 = time.perf_counter()
+        if self.online_features:
+            # Features come from the predictor's incremental state, no history reads
+            self.predictor.observe(batch)
+            predictions = self.predictor.predict_latest(list(by_patient))
+        else:
+            # History lookups per patient, then one batched model call for the burst
+            histories = {
+                pid: self.data_manager.get_patient_vitals_history(pid, limit=self.history_limit)
+                for pid in by_patient
+            }
+            predictions = self.predictor.predict_trend_many(histories)
+        timings["predict"].append(time.perf_counter() - p0)
+
+        # One fleet-wide alert pass for the burst
+        p1 = time.perf_counter()
+        twins = {}
+        for pid, readings in by_patient.items():
+            prediction = predictions.get(pid)
+            twins[pid] = {"vitals": readings, "predictions": [prediction] if prediction else []}
+        alerts = len(self.alert_manager.generate_alerts(twins))
+        timings["alert"].append(time.perf_counter() - p1)
+
+        timings["end_to_end"].append(time.perf_counter() - t0)
+        return alerts
+
+    def run(self, df):
+        """Replay a frame in DataManager's row layout and return a report dict."""
+        readings, stamps = self._to_readings(df)
+        timings = {stage: [] for stage in self.STAGES}
+        alerts = 0
+        max_lag = 0.0
+
+        start = time.perf_counter()
+        origin = stamps[0] if len(stamps) else 0
+        for lo, hi in self._bursts(stamps):
+            if self.keep_timing:
+                due = start + (stamps[lo] - origin) / 1e9 / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    max_lag = max(max_lag, -delay)
+            alerts += self._process(readings[lo:hi], timings)
+        elapsed = time.perf_counter() - start
+
+        recorded_span = (stamps[-1] - origin) / 1e9 if len(stamps) else 0.0
+        return {
+            "readings": len(readings),
+            "alerts": alerts,
+            "elapsed_s": elapsed,
+            "readings_per_sec": len(readings) / elapsed if elapsed else 0.0,
+            "recorded_span_s": recorded_span,
+            "effective_speed": recorded_span / elapsed if elapsed else 0.0,
+            "max_lag_s": max_lag,
+            "latency_ms": {stage: self._percentiles(values) for stage, values in timings.items()}
+        }
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return {"count": 0}
+        arr = np.asarray(values) * 1000.0
+        p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+        return {"count": len(arr), "p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(arr.max())}
+
+    @staticmethod
+    def format_report(report):
+        lines = [
+            f"Replayed {report['readings']} readings in {report['elapsed_s']:.2f}s "
+            f"({report['readings_per_sec']:.0f}/s, {report['effective_speed']:.1f}x recorded time), "
+            f"{report['alerts']} alerts, max lag {report['max_lag_s'] * 1000:.1f} ms"
+        ]
+        for stage, stats in report["latency_ms"].items():
+            if stats["count"]:
+                lines.append(
+                    f"  {stage:<11} n={stats['count']:<7} p50={stats['p50']:.3f}ms "
+                    f"p95={stats['p95']:.3f}ms p99={stats['p99']:.3f}ms max={stats['max']:.3f}ms"
+                )
+        return "\n".join(lines)
@@ -0,0 +1,103 @@
+import threading
+from collections import deque
+
+from .VitalsStore import timestamp_ns
+
+
+class VitalsRingIndex:
+    """Hot in-memory index of the most recent readings per patient and sensor.
+
+    Every (patient_id, sensor) series keeps a ring buffer of at most ``depth``
+    rows, plus one ring per patient across all sensors, so memory stays
+    bounded however long the process runs.
+    """
+
+    def __init__(self, depth=256):
+        self.depth = depth
+        self._series = {}
+        self._patients = {}
+        self._lock = threading.Lock()
+        # False when warmed from only part of the history: short rings may then be incomplete,
+        # except for patients known to have no history older than the warm-up read
+        self.complete = True
+        self._complete_patients = set()
+
+    def _ring(self, table, key):
+        ring = table.get(key)
+        if ring is None:
+            ring = table[key] = deque(maxlen=self.depth)
+        return ring
+
+    def add(self, row):
+        """Index one stored row (a dict with patient_id and sensor keys)."""
+        with self._lock:
+            self._ring(self._series, (row["patient_id"], row["sensor"])).append(row)
+            self._ring(self._patients, row["patient_id"]).append(row)
+
+    def add_many(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def warm(self, df, complete=True):
+        """Populate from a DataFrame of stored rows, keeping only each ring's tail."""
+        self.complete = complete
+        self._complete_patients.clear()
+        if df.empty:
+            return
+        recent = df.groupby(["patient_id", "sensor"], sort=False, dropna=False).tail(self.depth)
+        by_patient = df.groupby("patient_id", sort=False, dropna=False).tail(self.depth)
+        with self._lock:
+            for row in recent.to_dict("records"):
+                self._ring(self._series, (row["patient_id"], row["sensor"])).append(row)
+            for row in by_patient.to_dict("records"):
+                self._ring(self._patients, row["patient_id"]).append(row)
+
+    def mark_complete(self, patient_id):
+        """Record that the rings hold all of this patient's history (up to ``depth``)."""
+        with self._lock:
+            self._complete_patients.add(patient_id)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._patients.clear()
+            self._complete_patients.clear()
+
+    def latest(self, patient_id, sensor_type=None, limit=30):
+        """Return the last ``limit`` rows, or None if the ring is too shallow to answer."""
+        if limit > self.depth:
+            return None
+        with self._lock:
+            if sensor_type:
+                ring = self._series.get((patient_id, sensor_type), ())
+            else:
+                ring = self._patients.get(patient_id, ())
+            if limit <= 0:
+                return []
+            if not self.complete and len(ring) < limit and patient_id not in self._complete_patients:
+                return None
+            # Copies, so callers cannot mutate the indexed rows
+            return [dict(row) for row in list(ring)[-limit:]]
+
+    def series_since(self, patient_id, sensor_type, start_ns=None):
+        """(timestamp ns, row) pairs of one series with timestamp >= ``start_ns``.
+
+        Returns None when the ring may be missing some of them: it has
+        evicted rows (or was warmed partially) and its oldest row is newer
+        than ``start_ns``.
+        """
+        with self._lock:
+            rows = list(self._series.get((patient_id, sensor_type), ()))
+            whole = (self.complete or patient_id in self._complete_patients) and len(rows) < self.depth
+        stamped = []
+        for row in rows:
+            try:
+                stamped.append((timestamp_ns(row["timestamp"]), row))
+            except (TypeError, ValueError, KeyError):
+                continue
+        if not whole and (start_ns is None or not stamped or stamped[0][0] > start_ns):
+            return None
+        return [(ts, dict(row)) for ts, row in stamped if start_ns is None or ts >= start_ns]
+
+    def series_count(self):
+        return len(self._series)
@@ -0,0 +1,154 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .VitalsStore import timestamp_ns
+
+
+class VitalsRollups:
+    """Per-minute and per-hour min/mean/max of every (patient, sensor) series.
+
+    Buckets are updated in place as readings arrive (count, sum, min, max),
+    so each reading costs one dict lookup per resolution. Each series keeps
+    at most ``max_buckets[resolution]`` buckets, oldest dropped first.
+
+    When warmed from only part of the stored history, a series' buckets are
+    not trusted (``covers`` is False) until it has been rebuilt from its
+    full history with ``rebuild``.
+    """
+
+    RESOLUTIONS = {
+        "minute": 60 * 10**9,
+        "hour": 3600 * 10**9
+    }
+
+    def __init__(self, max_buckets=None):
+        # Default: a week of minutes, 90 days of hours
+        self.max_buckets = max_buckets or {"minute": 7 * 24 * 60, "hour": 90 * 24}
+        self._series = {}
+        self._lock = threading.Lock()
+        self.complete = True
+        self._complete_series = set()   # (patient_id, sensor) rebuilt from their full history
+
+    @staticmethod
+    def _number(value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if np.isnan(value) else value
+
+    def _update(self, key, resolution, bucket, count, total, low, high):
+        buckets = self._series.setdefault((key[0], key[1], resolution), {})
+        agg = buckets.get(bucket)
+        if agg is None:
+            buckets[bucket] = [count, total, low, high]
+            if len(buckets) > self.max_buckets[resolution]:
+                # Oldest by time, not by insertion: late readings may open older buckets
+                del buckets[min(buckets)]
+        else:
+            agg[0] += count
+            agg[1] += total
+            if low < agg[2]:
+                agg[2] = low
+            if high > agg[3]:
+                agg[3] = high
+
+    def add(self, row):
+        """Fold one stored row into every resolution."""
+        value = self._number(row.get("value"))
+        if value is None or row.get("timestamp") is None:
+            return
+        try:
+            ts = timestamp_ns(row["timestamp"])
+        except (TypeError, ValueError):
+            return
+        key = (row.get("patient_id"), row.get("sensor"))
+        with self._lock:
+            for resolution, width in self.RESOLUTIONS.items():
+                self._update(key, resolution, ts - ts % width, 1, value, value, value)
+
+    def add_many(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def warm(self, df, complete=True):
+        """Build buckets from a DataFrame of stored rows in one grouped pass.
+
+        ``complete`` is False when ``df`` is only the newest part of the history.
+        """
+        with self._lock:
+            self.complete = complete
+            self._complete_series.clear()
+        if df.empty:
+            return
+        frame = pd.DataFrame({
+            "patient_id": df["patient_id"],
+            "sensor": df["sensor"],
+            "ts": pd.to_datetime(df["timestamp"], errors="coerce"),
+            "value": pd.to_numeric(df["value"], errors="coerce")
+        }).dropna(subset=["ts", "value"])
+        if frame.empty:
+            return
+        ts = frame["ts"].astype("int64")
+        with self._lock:
+            for resolution, width in self.RESOLUTIONS.items():
+                frame["bucket"] = ts - ts % width
+                aggs = frame.groupby(["patient_id", "sensor", "bucket"], sort=True)["value"].agg(
+                    ["count", "sum", "min", "max"]
+                )
+                for (pid, sensor, bucket), agg in zip(aggs.index, aggs.itertuples(index=False)):
+                    self._update((pid, sensor), resolution, int(bucket),
+                                 int(agg.count), float(agg.sum), float(agg.min), float(agg.max))
+
+    def covers(self, patient_id, sensor_type):
+        """True if the series' buckets count every stored reading."""
+        return self.complete or (patient_id, sensor_type) in self._complete_series
+
+    def mark_complete(self, patient_id, sensor_type):
+        with self._lock:
+            self._complete_series.add((patient_id, sensor_type))
+
+    def rebuild(self, patient_id, sensor_type, df):
+        """Replace one series' buckets with ones built from ``df``, its full stored history."""
+        fresh = VitalsRollups(self.max_buckets)
+        fresh.warm(df)
+        with self._lock:
+            for resolution in self.RESOLUTIONS:
+                key = (patient_id, sensor_type, resolution)
+                buckets = fresh._series.get(key)
+                if buckets:
+                    self._series[key] = buckets
+                else:
+                    self._series.pop(key, None)
+            self._complete_series.add((patient_id, sensor_type))
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._complete_series.clear()
+
+    def get(self, patient_id, sensor_type, resolution="minute", start=None, end=None):
+        """Buckets overlapping [start, end], oldest first, as dict records."""
+        if resolution not in self.RESOLUTIONS:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        width = self.RESOLUTIONS[resolution]
+        start_ns = None if start is None else timestamp_ns(start) // width * width
+        end_ns = None if end is None else timestamp_ns(end)
+        with self._lock:
+            buckets = self._series.get((patient_id, sensor_type, resolution), {})
+            selected = sorted(
+                (bucket, list(agg)) for bucket, agg in buckets.items()
+                if (start_ns is None or bucket >= start_ns) and (end_ns is None or bucket <= end_ns)
+            )
+        return [
+            {
+                "timestamp": pd.Timestamp(bucket),
+                "count": count,
+                "min": low,
+                "mean": total / count,
+                "max": high
+            }
+            for bucket, (count, total, low, high) in selected
+        ]
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Compact integer codes for sensor names in array-based storage (0 = unknown)
+SENSOR_CODES = {
+    "ECG": 1,
+    "BP_SYS": 2,
+    "BP_DIA": 3,
+    "SpO2": 4,
+    "Temp": 5
+}
+
+
+def format_timestamp(ts):
+    """Normalise a timestamp to a fixed-width string that sorts chronologically."""
+    if ts is None:
+        return None
+    try:
+        return pd.Timestamp(ts).strftime(TIMESTAMP_FORMAT)
+    except (ValueError, TypeError):
+        return str(ts)
+
+
+_NAN = float("nan")
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+
+def timestamp_ns(ts):
+    """Convert a timestamp (datetime, string or epoch ns) to int64 epoch nanoseconds."""
+    if type(ts) is str and len(ts) <= 26:
+        # Stored text ("YYYY-MM-DD HH:MM:SS[.ffffff]"): no pandas parser needed
+        try:
+            ts = datetime.fromisoformat(ts)
+        except ValueError:
+            pass
+    if type(ts) is datetime:
+        # Fast path for plain datetimes (naive ones are read as UTC, like pandas)
+        return ((ts - (_EPOCH if ts.tzinfo is None else _EPOCH_UTC)) // _ONE_US) * 1000
+    return int(pd.Timestamp(ts).value)
+
+
+class VitalsStore:
+    """Interface shared by the DataManager storage backends.
+
+    Backends only have to implement ``append``, ``replace`` and ``read_all``;
+    the query helpers fall back to filtering a full read and should be
+    overridden by backends that can do better.
+    """
+
+    columns = []
+
+    def append(self, rows):
+        """Persist an iterable of row dicts."""
+        raise NotImplementedError
+
+    def replace(self, df):
+        """Replace the whole dataset with ``df``."""
+        raise NotImplementedError
+
+    def read_all(self):
+        """Return every stored row as a DataFrame."""
+        raise NotImplementedError
+
+    # Columns read back as text; the rest are numbers ("value" keeps whatever was written)
+    TEXT_COLUMNS = ("patient_id", "timestamp", "sensor", "value")
+
+    def as_stored(self, row):
+        """``row`` as reads return it: column order, timestamp text and NaN for missing numbers.
+
+        Lets in-memory copies of written rows (the ring index) match the ones
+        warmed from the store after a restart.
+        """
+        stored = {}
+        for col in self.columns:
+            val = row.get(col)
+            if val is None:
+                val = _NAN
+            elif col in self.TEXT_COLUMNS:
+                if col == "timestamp":
+                    val = self.stored_timestamp(val)
+            elif type(val) is not float:
+                try:
+                    val = float(val)
+                except (TypeError, ValueError):
+                    pass
+            stored[col] = val
+        return stored
+
+    @staticmethod
+    def stored_timestamp(ts):
+        """Timestamp text as written to the store (CSV backends write ``str``)."""
+        return str(ts)
+
+    def read_patient(self, patient_id, sensor_type=None, limit=None):
+        """Return the last ``limit`` rows for a patient (and sensor) in write order."""
+        rows = self.filter_patient(self.read_all(), patient_id, sensor_type)
+        return rows if limit is None else rows.tail(limit)
+
+    def read_range(self, patient_id, sensor_type=None, start=None, end=None):
+        """Return a patient's rows with start <= timestamp <= end, oldest first."""
+        return self.filter_range(self.read_patient(patient_id, sensor_type), start, end)
+
+    def read_recent(self):
+        """Rows used to warm in-memory indexes at startup.
+
+        Backends that only return part of their history here must set
+        ``recent_is_complete`` to False.
+        """
+        return self.read_all()
+
+    recent_is_complete = True
+
+    def external_rows(self, patient_id=None):
+        """Rows other writers (another process on the same store) added since the last call.
+
+        Counts from the last ``read_recent``. Returns None when the store was
+        compacted or rewritten elsewhere and the new rows cannot be told
+        apart, so in-memory views must be warmed again. Backends may limit the
+        check to ``patient_id``'s share of the store; single-writer backends
+        return nothing.
+        """
+        return pd.DataFrame(columns=self.columns)
+
+    def recent_covers(self, patient_id):
+        """True if ``read_recent`` returned every stored row of this patient.
+
+        Lets the ring index trust a shallow ring for a patient with no older
+        history even when the warm-up read was partial.
+        """
+        return self.recent_is_complete
+
+    @staticmethod
+    def filter_patient(df, patient_id, sensor_type=None):
+        rows = df[df["patient_id"] == patient_id]
+        if sensor_type:
+            rows = rows[rows["sensor"] == sensor_type]
+        return rows
+
+    @staticmethod
+    def filter_range(rows, start=None, end=None):
+        ts = pd.to_datetime(rows["timestamp"], errors="coerce")
+        mask = ts.notna()
+        if start is not None:
+            mask &= ts >= pd.Timestamp(start)
+        if end is not None:
+            mask &= ts <= pd.Timestamp(end)
+        return rows[mask].iloc[ts[mask].argsort(kind="stable")]
+
+    def compact(self):
+        pass
+
+    def maintain(self):
+        """Periodic housekeeping run from DataManager's maintenance thread."""
+        self.compact()
+
+    def close(self):
+        pass
@@ -1,9 +1,26 @@
 from .ProductionConfig import ProductionConfig
 from .DataManager import DataManager
 from .ProductionVitalsPredictor import ProductionVitalsPredictor
+from .ModelRegistry import ModelRegistry
+from .CompiledModel import CompiledModel
+from .PredictionCache import PredictionCache
+from .InferenceService import InferenceService
+from .VitalsFeatureExtractor import VitalsFeatureExtractor
+from .OnlineVitalsFeatures import OnlineVitalsFeatures
+from .VitalsForecaster import VitalsForecaster
 from .DigitalTwinManager import DigitalTwinManager
+from .AlertHistory import AlertHistory
 from .AlertManager import AlertManager
+from .NotificationDispatcher import NotificationDispatcher
+from .StreamingAlertRules import StreamingAlertRules
+from .ThresholdProfiles import ThresholdProfiles
+from .IngestServer import IngestServer
+from .RemoteDataManager import RemoteDataManager
 
 from .SimulatedECGSensor import SimulatedECGSensor
 from .SimulatedPulseOximeter import SimulatedPulseOximeter
 from .SimulatedBloodPressureMonitor import SimulatedBloodPressureMonitor
+from .StreamingRPeakDetector import StreamingRPeakDetector
+from .SensorFleet import SensorFleet
+from .SyntheticVitalsGenerator import SyntheticVitalsGenerator
+from .VitalsReplayer import VitalsReplayer
@@ -0,0 +1,86 @@
+import argparse
+import os
+import tempfile
+
+from .AlertManager import AlertManager
+from .CompiledModel import CompiledModel
+from .DataManager import DataManager
+from .IngestServer import IngestServer
+from .ProductionConfig import ProductionConfig
+from .ProductionVitalsPredictor import ProductionVitalsPredictor
+from .VitalsReplayer import VitalsReplayer
+
+
+def run_ingest(args):
+    config = ProductionConfig(storage_backend=args.backend, group_commit=True)
+    if args.authkey_file:
+        with open(args.authkey_file, "rb") as f:
+            config.ingest_authkey = f.read().strip()
+    address = args.address or config.ingest_address
+    server = IngestServer(DataManager(config), address, config.ingest_authkey)
+    print(f"Vitals ingest daemon listening on {address}")
+    server.serve_forever()
+
+
+def run_replay(args):
+    # Replay into a scratch store unless told otherwise, so production data is untouched
+    data_path = args.data_path or os.path.join(tempfile.mkdtemp(prefix="vitals-replay-"), "vitals.csv")
+    config = ProductionConfig(data_path=data_path, storage_backend=args.backend, group_commit=args.group_commit,
+                              notification_sinks=args.notify)
+    data_manager = DataManager(config)
+    alert_manager = AlertManager(config, data_manager)
+    replayer = VitalsReplayer(
+        data_manager,
+        ProductionVitalsPredictor(config),
+        alert_manager,
+        speed=None if args.speed == "max" else float(args.speed),
+        keep_timing=not args.no_timing,
+        batch_size=args.batch_size
+    )
+    report = replayer.run(VitalsReplayer.load_csv(args.csv))
+    alert_manager.close()
+    data_manager.close()
+    print(VitalsReplayer.format_report(report))
+
+
+def run_export_model(args):
+    config = ProductionConfig()
+    model_path = args.model or config.model_path
+    output = args.output or (os.path.splitext(model_path)[0] + ".npz" if args.model else config.compiled_model_path)
+    compiled = CompiledModel.export(model_path, output)
+    print(f"Compiled {compiled.meta['estimator']} ({compiled.kind}) from {model_path} to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m edge_core", description="edge_core command line tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Run the single-writer vitals ingest daemon.")
+    ingest.add_argument("--address", help="Unix socket path or host:port (defaults to the config value)")
+    ingest.add_argument("--backend", default="segments", choices=["segments", "partitioned", "sqlite"])
+    ingest.add_argument("--authkey-file", help="File holding the shared auth key (required for non-loopback TCP)")
+    ingest.set_defaults(func=run_ingest)
+
+    replay = commands.add_parser("replay", help="Replay a vitals CSV export through ingest, prediction and alerts.")
+    replay.add_argument("csv", help="CSV exported from DataManager (load_data) or a data_path file")
+    replay.add_argument("--speed", default="max", help="Replay speed multiplier (1, 10, ...) or 'max'")
+    replay.add_argument("--no-timing", action="store_true", help="Ignore inter-arrival gaps even with --speed")
+    replay.add_argument("--batch-size", type=int, default=500)
+    replay.add_argument("--backend", default="segments", choices=["segments", "partitioned", "sqlite"])
+    replay.add_argument("--group-commit", action="store_true")
+    replay.add_argument("--data-path", help="Store to replay into (defaults to a scratch directory)")
+    replay.add_argument("--notify", action="append", metavar="SINK",
+                        help="Deliver alerts to a sink: stdout, file:<path> or a webhook URL (repeatable)")
+    replay.set_defaults(func=run_replay)
+
+    export = commands.add_parser("export-model", help="Compile the pickled model to a NumPy-only .npz artifact.")
+    export.add_argument("--model", help="Pickled estimator (defaults to the config model_path)")
+    export.add_argument("--output", help="Output .npz (defaults to the model path with a .npz suffix)")
+    export.set_defaults(func=run_export_model)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
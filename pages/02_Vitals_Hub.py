@@ -5,6 +5,7 @@ import pandas as pd
 from datetime import datetime
 import numpy as np
 from vitals_bridge import set_latest_vitals
+from edge_core.VitalsForecaster import VitalsForecaster
 
 st.set_page_config(page_title="Vitals Hub", page_icon="💓", layout="centered")
 st.title("💓 Vitals Hub")
@@ -48,6 +49,14 @@ if not df.empty:
     last = df.iloc[-1].to_dict()
     st.write("**Most recent vitals:**", last)
 
+    if "timestamp" in df.columns:
+        forecaster = VitalsForecaster()
+        forecaster.fit_frame("session", df)
+        forecast = forecaster.forecast_frame("session")
+        st.session_state["vitals_forecast"] = forecast
+        st.write("**Forecast (next 15 / 30 / 60 min):**")
+        st.dataframe(forecast, use_container_width=True)
+
     if st.button("✅ Publish your real time vital to the chat bot"):
         vitals_dict = {
             "timestamp": str(last.get("timestamp", datetime.now().isoformat())),